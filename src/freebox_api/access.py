@@ -1,18 +1,37 @@
+import asyncio
+import copy
 import hmac
 import json
 import logging
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Collection
 from collections.abc import Mapping
+from http import HTTPStatus
 from typing import Any
 from urllib.parse import urljoin
 
+from aiohttp import ClientError
+from aiohttp import ClientResponse
 from aiohttp import ClientSession
+from aiohttp import ClientTimeout
+from aiohttp import ClientWebSocketResponse
+from aiohttp import FormData
+from aiohttp import WSServerHandshakeError
 
+from freebox_api.cache import ResponseCache
+from freebox_api.cache import get_resource
 from freebox_api.exceptions import AuthorizationError
 from freebox_api.exceptions import HttpRequestError
 from freebox_api.exceptions import InsufficientPermissionsError
+from freebox_api.throttle import RequestThrottle
 
 logger = logging.getLogger(__name__)
 
+# Delay before retrying a failed background session renewal, in seconds
+_SESSION_RENEWAL_RETRY_DELAY = 30
+
 
 class Access:
     def __init__(
@@ -22,14 +41,32 @@ class Access:
         app_token: str,
         app_id: str,
         http_timeout: int,
+        *,
+        cache: ResponseCache | None = None,
+        throttle: RequestThrottle | None = None,
+        use_models: bool = False,
     ):
         self.session = session
         self.base_url = base_url
         self.app_token = app_token
         self.app_id = app_id
         self.timeout = http_timeout
+        self.cache = cache
+        self.throttle = throttle
+        # Return models rather than dicts from the methods supporting them
+        self.use_models = use_models
         self.session_token: str | None = None
         self.session_permissions: dict[str, bool] | None = None
+        self._refresh_task: asyncio.Task[None] | None = None
+        self._renewal_task: asyncio.Task[None] | None = None
+        self._session_opened_at: float | None = None
+        # Number of login exchanges performed, and of refreshes avoided by
+        # joining an in-flight exchange or replaying with a newer token
+        self.session_refresh_count = 0
+        self.session_refresh_saved_count = 0
+        # In-flight GET requests by url, shared by concurrent identical reads
+        self._pending_gets: dict[str, asyncio.Future[Any]] = {}
+        self.get_coalesced_count = 0
 
     async def _get_challenge(self, base_url, timeout=10):
         """
@@ -76,44 +113,137 @@ class Access:
         return (session_token, session_permissions)
 
     async def _refresh_session_token(self):
-        # Get token for the current session
-        session_token, session_permissions = await self._get_session_token(
-            self.base_url, self.app_token, self.app_id, self.timeout
-        )
+        """
+        Refresh the session token
+
+        Concurrent callers share a single in-flight login exchange.
+        """
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._open_session())
+            self.session_refresh_count += 1
+        else:
+            self.session_refresh_saved_count += 1
+        # Shield the exchange so a cancelled caller does not abort it for others
+        await asyncio.shield(self._refresh_task)
+
+    async def _open_session(self):
+        try:
+            # Get token for the current session
+            session_token, session_permissions = await self._get_session_token(
+                self.base_url, self.app_token, self.app_id, self.timeout
+            )
+        finally:
+            self._refresh_task = None
 
         logger.info("Session opened")
         logger.info("Permissions: " + str(session_permissions))
         self.session_token = session_token
         self.session_permissions = session_permissions
+        self._session_opened_at = time.monotonic()
 
-    def _get_headers(self) -> dict[str, str | None]:
-        return {"X-Fbx-App-Auth": self.session_token}
+    def restore_session(
+        self, session_token: str, session_permissions: dict[str, bool] | None
+    ) -> None:
+        """
+        Use a session opened previously, for instance by another process
 
-    async def _perform_request(self, verb, end_url, **kwargs):
+        If it expired, the session is opened again on the first request.
+        """
+        self.session_token = session_token
+        self.session_permissions = session_permissions
+        self._session_opened_at = time.monotonic()
+
+    def session_age(self) -> float | None:
+        """
+        Returns the number of seconds since the session was opened,
+        or None if no session is open
+        """
+        if self._session_opened_at is None:
+            return None
+        return time.monotonic() - self._session_opened_at
+
+    def start_session_renewal(self, interval: float) -> None:
+        """
+        Renew the session token in the background every `interval` seconds,
+        so that requests never have to wait for an expired session refresh
+        """
+        self.stop_session_renewal()
+        self._renewal_task = asyncio.ensure_future(self._renew_session(interval))
+
+    def stop_session_renewal(self) -> None:
+        """
+        Stop the background session renewal, if started
+        """
+        if self._renewal_task is not None:
+            self._renewal_task.cancel()
+            self._renewal_task = None
+
+    async def _renew_session(self, interval: float) -> None:
+        while True:
+            age = self.session_age()
+            # The session may have been refreshed by a request in the meantime
+            if age is not None and age < interval:
+                await asyncio.sleep(interval - age)
+                continue
+
+            try:
+                await self._refresh_session_token()
+            except (AuthorizationError, ClientError, asyncio.TimeoutError) as err:
+                logger.warning("Session renewal failed: %s", err)
+                await asyncio.sleep(min(interval, _SESSION_RENEWAL_RETRY_DELAY))
+            else:
+                logger.debug("Session renewed")
+
+    def _get_headers(
+        self, headers: Mapping[str, str] | None = None
+    ) -> dict[str, str | None]:
+        return {**(headers or {}), "X-Fbx-App-Auth": self.session_token}
+
+    async def _perform_request(
+        self, verb, end_url, build_data=None, raw_statuses=None, **kwargs
+    ):
         """
         Perform the given request, refreshing the session token if needed
+
+        If given, `build_data` is awaited to build a new request body for
+        each attempt, for bodies which can only be sent once.
+        If `raw_statuses` is given, responses with a successful status or one
+        of these statuses are returned without reading their body, other
+        responses are read as API errors.
         """
         if not self.session_token:
             await self._refresh_session_token()
 
         url = urljoin(self.base_url, end_url)
+        sent_token = self.session_token
+        headers = kwargs.pop("headers", None)
         request_params = {
-            **kwargs,
-            "headers": self._get_headers(),
             "timeout": self.timeout,
+            **kwargs,
+            "headers": self._get_headers(headers),
         }
-        resp = await verb(url, **request_params)
+        if build_data is not None:
+            request_params["data"] = await build_data()
+        resp = await self._send(verb, end_url, url, request_params)
 
-        # Return response if content is not json
-        if resp.content_type != "application/json":
+        # Return responses which are not API results as is
+        if _is_raw(resp, raw_statuses):
             return resp
 
         resp_data = await resp.json()
         if resp_data.get("error_code") in ["auth_required", "invalid_session"]:
             logger.debug("Invalid session")
-            await self._refresh_session_token()
-            request_params["headers"] = self._get_headers()
-            resp = await verb(url, **request_params)
+            if self.session_token == sent_token:
+                await self._refresh_session_token()
+            else:
+                # Session was refreshed while this request was in flight
+                self.session_refresh_saved_count += 1
+            request_params["headers"] = self._get_headers(headers)
+            if build_data is not None:
+                request_params["data"] = await build_data()
+            resp = await self._send(verb, end_url, url, request_params)
+            if _is_raw(resp, raw_statuses):
+                return resp
             resp_data = await resp.json()
 
         if not resp_data["success"]:
@@ -124,13 +254,118 @@ class Access:
 
         return resp_data.get("result")
 
+    async def _send(self, verb, end_url, url, request_params):
+        """
+        Send a request once the throttle, if any, lets it go
+        """
+        if self.throttle is None:
+            return await verb(url, **request_params)
+
+        # Only count the request in flight until its response headers are
+        # received, so that streamed bodies do not hold back other requests
+        async with self.throttle.request(end_url):
+            return await verb(url, **request_params)
+
     async def get(
         self, end_url: str
     ) -> Any:  # Union[Dict[str, Any], List[Dict[str, Any]]]:
         """
         Send get request and return results
         """
-        return await self._perform_request(self.session.get, end_url)
+        if self.cache is None:
+            return await self._shared_get(end_url)
+
+        hit, result = self.cache.lookup(end_url)
+        if hit:
+            return result
+
+        generation = self.cache.generation
+        result = await self._shared_get(end_url)
+        if not isinstance(result, ClientResponse):
+            self.cache.store(end_url, result, generation)
+        return result
+
+    async def _shared_get(self, end_url: str) -> Any:
+        """
+        Perform a get request, joining an identical one already in flight
+        """
+        pending = self._pending_gets.get(end_url)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                self._perform_request(self.session.get, end_url)
+            )
+            self._pending_gets[end_url] = pending
+            pending.add_done_callback(lambda _: self._forget_get(end_url, pending))
+            # Shield the request so a cancelled caller does not abort it for others
+            return await asyncio.shield(pending)
+
+        self.get_coalesced_count += 1
+        result = await asyncio.shield(pending)
+        # Do not let callers mutate each other's results
+        if isinstance(result, ClientResponse):
+            return result
+        return copy.deepcopy(result)
+
+    async def get_raw(
+        self,
+        end_url: str,
+        headers: Mapping[str, str] | None = None,
+        *,
+        allowed_statuses: Collection[int] = (),
+    ) -> ClientResponse:
+        """
+        Send get request and return the response without reading its body,
+        so that large contents can be streamed
+
+        The caller must release the response once done. Error statuses raise
+        an HttpRequestError, but for the `allowed_statuses`.
+        """
+        resp = await self._perform_request(
+            self.session.get,
+            end_url,
+            raw_statuses=allowed_statuses,
+            headers=headers,
+            timeout=self._get_transfer_timeout(),
+        )
+        if not isinstance(resp, ClientResponse):
+            raise HttpRequestError(f"Unexpected JSON response (url: {end_url})")
+        if not resp.ok and resp.status not in allowed_statuses:
+            resp.release()
+            raise HttpRequestError(
+                f"Request failed (url: {end_url}, status: {resp.status})"
+            )
+        return resp
+
+    async def ws_connect(
+        self, end_url: str, heartbeat: float | None = None
+    ) -> ClientWebSocketResponse:
+        """
+        Open an authenticated websocket, refreshing the session token if needed
+        """
+        if not self.session_token:
+            await self._refresh_session_token()
+
+        url = urljoin(self.base_url, end_url)
+        sent_token = self.session_token
+        try:
+            return await self.session.ws_connect(
+                url, headers={"X-Fbx-App-Auth": sent_token or ""}, heartbeat=heartbeat
+            )
+        except WSServerHandshakeError as err:
+            if err.status not in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
+                raise
+            logger.debug("Invalid session")
+
+        if self.session_token == sent_token:
+            await self._refresh_session_token()
+        else:
+            # Session was refreshed while connecting
+            self.session_refresh_saved_count += 1
+        return await self.session.ws_connect(
+            url,
+            headers={"X-Fbx-App-Auth": self.session_token or ""},
+            heartbeat=heartbeat,
+        )
 
     async def post(
         self, end_url: str, payload: Mapping[str, Any] | None = None
@@ -139,7 +374,38 @@ class Access:
         Send post request and return results
         """
         data = json.dumps(payload) if payload else None
-        return await self._perform_request(self.session.post, end_url, data=data)  # type: ignore
+        try:
+            return await self._perform_request(self.session.post, end_url, data=data)  # type: ignore
+        finally:
+            self._invalidate_cache(end_url)
+
+    async def post_multipart(
+        self, end_url: str, build_form: Callable[[], Awaitable[FormData]]
+    ) -> dict[str, Any]:
+        """
+        Send multipart/form-data post request and return results
+
+        `build_form` is awaited to build the form of each attempt, so that
+        streamed file fields can be sent again after a session refresh.
+        """
+        try:
+            return await self._perform_request(  # type: ignore
+                self.session.post,
+                end_url,
+                build_data=build_form,
+                timeout=self._get_transfer_timeout(),
+            )
+        finally:
+            self._invalidate_cache(end_url)
+
+    def _get_transfer_timeout(self) -> ClientTimeout:
+        """
+        Returns a timeout bounding the connection and each socket read,
+        but not a whole transfer of arbitrary size
+        """
+        return ClientTimeout(
+            total=None, sock_connect=self.timeout, sock_read=self.timeout
+        )
 
     async def put(
         self, end_url: str, payload: dict[str, Any] | None = None
@@ -148,7 +414,10 @@ class Access:
         Send post request and return results
         """
         data = json.dumps(payload) if payload else None
-        return await self._perform_request(self.session.put, end_url, data=data)  # type: ignore
+        try:
+            return await self._perform_request(self.session.put, end_url, data=data)  # type: ignore
+        finally:
+            self._invalidate_cache(end_url)
 
     async def delete(
         self, end_url: str, payload: dict[str, Any] | None = None
@@ -157,7 +426,23 @@ class Access:
         Send delete request and return results
         """
         data = json.dumps(payload) if payload else None
-        return await self._perform_request(self.session.delete, end_url, data=data)  # type: ignore
+        try:
+            return await self._perform_request(self.session.delete, end_url, data=data)  # type: ignore
+        finally:
+            self._invalidate_cache(end_url)
+
+    def _forget_get(self, end_url: str, pending: asyncio.Future[Any]) -> None:
+        # A newer request may have replaced this one after a write
+        if self._pending_gets.get(end_url) is pending:
+            del self._pending_gets[end_url]
+
+    def _invalidate_cache(self, end_url: str) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(end_url)
+        # Reads issued after a write must not join the reads sent before it
+        resource = get_resource(end_url)
+        for key in [k for k in self._pending_gets if get_resource(k) == resource]:
+            del self._pending_gets[key]
 
     async def get_permissions(self) -> dict[str, bool] | None:
         """
@@ -166,3 +451,12 @@ class Access:
         if not self.session_permissions:
             await self._refresh_session_token()
         return self.session_permissions
+
+
+def _is_raw(resp: ClientResponse, raw_statuses: Collection[int] | None) -> bool:
+    """
+    Returns whether a response is returned as is rather than read as JSON
+    """
+    if resp.content_type != "application/json":
+        return True
+    return raw_statuses is not None and (resp.ok or resp.status in raw_statuses)
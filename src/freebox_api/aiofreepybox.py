@@ -1,49 +1,57 @@
 import asyncio
+import importlib
 import json
 import logging
 import socket
 import ssl
 from os import PathLike
 from os import path
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Union
 from urllib.parse import urljoin
 
+from aiohttp import BaseConnector
 from aiohttp import ClientSession
 from aiohttp import ClientTimeout
 from aiohttp import TCPConnector
 
 import freebox_api
 from freebox_api.access import Access
-from freebox_api.api.airmedia import Airmedia
-from freebox_api.api.call import Call
-from freebox_api.api.connection import Connection
-from freebox_api.api.dhcp import Dhcp
-from freebox_api.api.download import Download
-from freebox_api.api.freeplug import Freeplug
-from freebox_api.api.fs import Fs
-from freebox_api.api.ftp import Ftp
-from freebox_api.api.fw import Fw
-from freebox_api.api.home import Home
-from freebox_api.api.lan import Lan
-from freebox_api.api.lcd import Lcd
-from freebox_api.api.netshare import Netshare
-from freebox_api.api.notifications import Notifications
-from freebox_api.api.parental import Parental
-from freebox_api.api.phone import Phone
-from freebox_api.api.player import Player
-from freebox_api.api.remote import Remote
-from freebox_api.api.rrd import Rrd
-from freebox_api.api.storage import Storage
-from freebox_api.api.switch import Switch
-from freebox_api.api.system import System
-from freebox_api.api.tv import Tv
-from freebox_api.api.upnpav import Upnpav
-from freebox_api.api.upnpigd import Upnpigd
-from freebox_api.api.wifi import Wifi
+from freebox_api.cache import ResponseCache
 from freebox_api.exceptions import AuthorizationError
 from freebox_api.exceptions import InvalidTokenError
 from freebox_api.exceptions import NotOpenError
+from freebox_api.throttle import RequestThrottle
+
+if TYPE_CHECKING:
+    from freebox_api.api.airmedia import Airmedia
+    from freebox_api.api.call import Call
+    from freebox_api.api.connection import Connection
+    from freebox_api.api.dhcp import Dhcp
+    from freebox_api.api.download import Download
+    from freebox_api.api.events import Events
+    from freebox_api.api.freeplug import Freeplug
+    from freebox_api.api.fs import Fs
+    from freebox_api.api.ftp import Ftp
+    from freebox_api.api.fw import Fw
+    from freebox_api.api.home import Home
+    from freebox_api.api.lan import Lan
+    from freebox_api.api.lcd import Lcd
+    from freebox_api.api.netshare import Netshare
+    from freebox_api.api.notifications import Notifications
+    from freebox_api.api.parental import Parental
+    from freebox_api.api.phone import Phone
+    from freebox_api.api.player import Player
+    from freebox_api.api.remote import Remote
+    from freebox_api.api.rrd import Rrd
+    from freebox_api.api.storage import Storage
+    from freebox_api.api.switch import Switch
+    from freebox_api.api.system import System
+    from freebox_api.api.tv import Tv
+    from freebox_api.api.upnpav import Upnpav
+    from freebox_api.api.upnpigd import Upnpigd
+    from freebox_api.api.wifi import Wifi
 
 # Token file default location
 DEFAULT_TOKEN_FILENAME: str = "app_auth"  # noqa S105
@@ -60,10 +68,101 @@ DEFAULT_APP_DESC: dict[str, str] = {
 
 DEFAULT_TIMEOUT = 10
 
+# Default connection pool options, same as aiohttp defaults
+DEFAULT_CONNECTION_LIMIT = 100
+DEFAULT_CONNECTION_LIMIT_PER_HOST = 0  # no limit
+DEFAULT_KEEPALIVE_TIMEOUT = 15
+DEFAULT_DNS_CACHE_TTL = 10
+
 StrOrPath = Union[str, "PathLike[str]"]  # type TypeAlias but issues with <= py3.9
 
 logger = logging.getLogger(__name__)
 
+# Freebox modules, imported and instantiated on first access:
+# attribute -> (module, class)
+_API_MODULES: dict[str, tuple[str, str]] = {
+    "tv": ("freebox_api.api.tv", "Tv"),
+    "system": ("freebox_api.api.system", "System"),
+    "dhcp": ("freebox_api.api.dhcp", "Dhcp"),
+    "airmedia": ("freebox_api.api.airmedia", "Airmedia"),
+    "player": ("freebox_api.api.player", "Player"),
+    "switch": ("freebox_api.api.switch", "Switch"),
+    "lan": ("freebox_api.api.lan", "Lan"),
+    "storage": ("freebox_api.api.storage", "Storage"),
+    "lcd": ("freebox_api.api.lcd", "Lcd"),
+    "wifi": ("freebox_api.api.wifi", "Wifi"),
+    "phone": ("freebox_api.api.phone", "Phone"),
+    "ftp": ("freebox_api.api.ftp", "Ftp"),
+    "fs": ("freebox_api.api.fs", "Fs"),
+    "fw": ("freebox_api.api.fw", "Fw"),
+    "freeplug": ("freebox_api.api.freeplug", "Freeplug"),
+    "call": ("freebox_api.api.call", "Call"),
+    "connection": ("freebox_api.api.connection", "Connection"),
+    "download": ("freebox_api.api.download", "Download"),
+    "events": ("freebox_api.api.events", "Events"),
+    "home": ("freebox_api.api.home", "Home"),
+    "parental": ("freebox_api.api.parental", "Parental"),
+    "netshare": ("freebox_api.api.netshare", "Netshare"),
+    "notifications": ("freebox_api.api.notifications", "Notifications"),
+    "remote": ("freebox_api.api.remote", "Remote"),
+    "rrd": ("freebox_api.api.rrd", "Rrd"),
+    "upnpav": ("freebox_api.api.upnpav", "Upnpav"),
+    "upnpigd": ("freebox_api.api.upnpigd", "Upnpigd"),
+}
+
+
+def _create_ssl_context(cafile: str) -> ssl.SSLContext:
+    """
+    Create an SSL context with system default certificates and the provided freebox CA file.
+    """
+
+    ssl_ctx = ssl.create_default_context()
+    ssl_ctx.load_verify_locations(cafile=cafile)
+
+    # Disable strict validation introduced in Python 3.13, which doesn't
+    # work with Freebox/iliadbox self-signed gateway certificates
+    ssl_ctx.verify_flags &= ~ssl.VERIFY_X509_STRICT
+
+    return ssl_ctx
+
+
+async def create_connector(
+    limit: int = DEFAULT_CONNECTION_LIMIT,
+    limit_per_host: int = DEFAULT_CONNECTION_LIMIT_PER_HOST,
+    keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+    use_dns_cache: bool = True,
+    ttl_dns_cache: int | None = DEFAULT_DNS_CACHE_TTL,
+) -> TCPConnector:
+    """
+    Create a connector trusting the freebox certificate authority, which can
+    be shared by several Freepybox instances
+
+    limit : `int`
+        Maximum number of open connections, 0 for no limit
+    limit_per_host : `int`
+        Maximum number of open connections to a same freebox, 0 for no limit
+    keepalive_timeout : `float`
+        Seconds an idle connection is kept open for reuse
+    use_dns_cache : `bool`
+        Cache host name resolutions
+    ttl_dns_cache : `int`
+        Seconds a host name resolution is cached, None to cache forever
+    """
+    cert_path = path.join(path.dirname(__file__), "freebox_certificates.pem")
+
+    # Create SSL context in executor thread to avoid blocking I/O of
+    # load_default_certs() and load_verify_locations().
+    ssl_ctx = await asyncio.to_thread(_create_ssl_context, cafile=cert_path)
+
+    return TCPConnector(
+        ssl_context=ssl_ctx,
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        use_dns_cache=use_dns_cache,
+        ttl_dns_cache=ttl_dns_cache,
+    )
+
 
 class Freepybox:
     def __init__(
@@ -72,15 +171,48 @@ class Freepybox:
         token_file: StrOrPath = DEFAULT_TOKEN_FILE,
         api_version: str = "v3",
         timeout: int = DEFAULT_TIMEOUT,
+        *,
+        session_renewal_interval: float | None = None,
+        cache: ResponseCache | None = None,
+        throttle: RequestThrottle | None = None,
+        use_models: bool = False,
+        persist_session: bool = False,
+        connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+        connection_limit_per_host: int = DEFAULT_CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        use_dns_cache: bool = True,
+        ttl_dns_cache: int | None = DEFAULT_DNS_CACHE_TTL,
+        connector: BaseConnector | None = None,
+        session: ClientSession | None = None,
     ):
+        """
+        The connection pool options are ignored if a `connector` or a
+        `session` is given. A given connector or session can be shared by
+        several instances and is not closed by `close`: create it with
+        `create_connector` so that it trusts the freebox certificate authority.
+        """
         self.app_desc: dict[str, str] = app_desc
         self.token_file: StrOrPath = token_file
         self.api_version: str = api_version
         self.timeout: int = timeout
+        self.session_renewal_interval: float | None = session_renewal_interval
+        self.cache: ResponseCache | None = cache
+        self.throttle: RequestThrottle | None = throttle
+        self.use_models: bool = use_models
+        self.persist_session: bool = persist_session
+        self._connector_options: dict[str, Any] = {
+            "limit": connection_limit,
+            "limit_per_host": connection_limit_per_host,
+            "keepalive_timeout": keepalive_timeout,
+            "use_dns_cache": use_dns_cache,
+            "ttl_dns_cache": ttl_dns_cache,
+        }
+        self._shared_connector: BaseConnector | None = connector
+        self._shared_session: ClientSession | None = session
         self._session: ClientSession
         self._access: Access
 
-        # Define modules
+        # Define modules, instantiated on first access once open
         self.tv: Tv
         self.system: System
         self.dhcp: Dhcp
@@ -99,6 +231,7 @@ class Freepybox:
         self.call: Call
         self.connection: Connection
         self.download: Download
+        self.events: Events
         self.home: Home
         self.parental: Parental
         self.netshare: Netshare
@@ -108,54 +241,83 @@ class Freepybox:
         self.upnpav: Upnpav
         self.upnpigd: Upnpigd
 
-    async def open(self, host: str, port: str) -> None:
+    async def open(self, host: str, port: str, *, login: bool = False) -> None:
         """
-        Open a session to the freebox, get a valid access module
-        and instantiate freebox modules
+        Open a session to the freebox and get a valid access module
+
+        login : `bool`, optional
+            Log in now rather than on the first request, default to False
         """
         if not self._is_app_desc_valid(self.app_desc):
             raise InvalidTokenError("Invalid application descriptor")
 
-        cert_path = path.join(path.dirname(__file__), "freebox_certificates.pem")
+        if self._shared_session is not None:
+            self._session = self._shared_session
+        elif self._shared_connector is not None:
+            self._session = ClientSession(
+                connector=self._shared_connector, connector_owner=False
+            )
+        else:
+            conn = await create_connector(**self._connector_options)
+            self._session = ClientSession(connector=conn)
 
-        # Create SSL context in executor thread to avoid blocking I/O of
-        # load_default_certs() and load_verify_locations().
-        ssl_ctx = await asyncio.to_thread(self._create_ssl_context, cafile=cert_path)
+        try:
+            self._access = await self._get_freebox_access(
+                host,
+                port,
+                self.api_version,
+                self.token_file,
+                self.app_desc,
+                self.timeout,
+            )
+            await self._open_session(login)
+        except BaseException:
+            if self._session is not self._shared_session:
+                await self._session.close()
+            raise
+
+        if self.session_renewal_interval:
+            self._access.start_session_renewal(self.session_renewal_interval)
+
+        # Freebox modules will be instantiated again with the new access,
+        # stop the events websocket of the previous one
+        if "events" in self.__dict__:
+            await self.events.close()
+        for name in _API_MODULES:
+            self.__dict__.pop(name, None)
+
+    async def _open_session(self, login: bool) -> None:
+        """
+        Restore the stored session, or log in if `login`
+        """
+        if self.persist_session:
+            # Reuse the session of a previous run, it is validated by the first
+            # request and transparently opened again if expired
+            session_token, session_permissions = await asyncio.to_thread(
+                self._readfile_session_token, self.token_file, self._access.base_url
+            )
+            if session_token is not None:
+                logger.info("Reuse stored session")
+                self._access.restore_session(session_token, session_permissions)
 
-        conn = TCPConnector(ssl_context=ssl_ctx)
-        self._session = ClientSession(connector=conn)
+        if login and not self._access.session_token:
+            await self._access.get_permissions()
 
-        self._access = await self._get_freebox_access(
-            host, port, self.api_version, self.token_file, self.app_desc, self.timeout
-        )
+    def __getattr__(self, name: str) -> Any:
+        """
+        Import and instantiate freebox modules on first access
+        """
+        api_module = _API_MODULES.get(name)
+        if api_module is None or "_access" not in self.__dict__:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
 
-        # Instantiate freebox modules
-        self.tv = Tv(self._access)
-        self.system = System(self._access)
-        self.dhcp = Dhcp(self._access)
-        self.airmedia = Airmedia(self._access)
-        self.player = Player(self._access)
-        self.switch = Switch(self._access)
-        self.lan = Lan(self._access)
-        self.storage = Storage(self._access)
-        self.lcd = Lcd(self._access)
-        self.wifi = Wifi(self._access)
-        self.phone = Phone(self._access)
-        self.ftp = Ftp(self._access)
-        self.fs = Fs(self._access)
-        self.fw = Fw(self._access)
-        self.freeplug = Freeplug(self._access)
-        self.call = Call(self._access)
-        self.connection = Connection(self._access)
-        self.download = Download(self._access)
-        self.home = Home(self._access)
-        self.parental = Parental(self._access)
-        self.netshare = Netshare(self._access)
-        self.notifications = Notifications(self._access)
-        self.remote = Remote(self._access)
-        self.rrd = Rrd(self._access)
-        self.upnpav = Upnpav(self._access)
-        self.upnpigd = Upnpigd(self._access)
+        module_name, class_name = api_module
+        module = importlib.import_module(module_name)
+        instance = getattr(module, class_name)(self._access)
+        setattr(self, name, instance)
+        return instance
 
     async def close(self) -> None:
         """
@@ -164,8 +326,22 @@ class Freepybox:
         if not self._access:
             raise NotOpenError("Freebox is not open")
 
-        await self._access.post("login/logout")
-        await self._session.close()
+        self._access.stop_session_renewal()
+        if "events" in self.__dict__:
+            await self.events.close()
+        if self.persist_session and self._access.session_token:
+            # Keep the session open for the next run
+            await asyncio.to_thread(
+                self._writefile_session_token,
+                self._access.session_token,
+                self._access.session_permissions,
+                self._access.base_url,
+                self.token_file,
+            )
+        else:
+            await self._access.post("login/logout")
+        if self._session is not self._shared_session:
+            await self._session.close()
 
     async def get_permissions(self) -> dict[str, bool] | None:
         """
@@ -185,21 +361,6 @@ class Freepybox:
             return await self._access.get_permissions()
         return None
 
-    @staticmethod
-    def _create_ssl_context(cafile: str) -> ssl.SSLContext:
-        """
-        Create an SSL context with system default certificates and the provided freebox CA file.
-        """
-
-        ssl_ctx = ssl.create_default_context()
-        ssl_ctx.load_verify_locations(cafile=cafile)
-
-        # Disable strict validation introduced in Python 3.13, which doesn't
-        # work with Freebox/iliadbox self-signed gateway certificates
-        ssl_ctx.verify_flags &= ~ssl.VERIFY_X509_STRICT
-
-        return ssl_ctx
-
     async def _get_freebox_access(
         self,
         host: str,
@@ -264,7 +425,14 @@ class Freepybox:
 
         # Create freebox http access module
         fbx_access = Access(
-            self._session, base_url, app_token, app_desc["app_id"], timeout
+            self._session,
+            base_url,
+            app_token,
+            app_desc["app_id"],
+            timeout,
+            cache=self.cache,
+            throttle=self.throttle,
+            use_models=self.use_models,
         )
 
         return fbx_access
@@ -354,6 +522,46 @@ class Freepybox:
         except FileNotFoundError:
             return (None, None, None)
 
+    def _writefile_session_token(
+        self,
+        session_token: str,
+        session_permissions: dict[str, bool] | None,
+        base_url: str,
+        token_file: StrOrPath,
+    ) -> None:
+        """
+        Store the session token next to the application token
+        """
+        with open(token_file) as f:
+            file_content = json.load(f)
+
+        file_content.update(
+            {
+                "session_token": session_token,
+                "session_permissions": session_permissions,
+                "session_base_url": base_url,
+            }
+        )
+        with open(token_file, "w") as f:
+            json.dump(file_content, f)
+
+    def _readfile_session_token(
+        self, token_file: StrOrPath, base_url: str
+    ) -> tuple[str, dict[str, bool] | None] | tuple[None, None]:
+        """
+        Read the session token stored for the given base url.
+        Returns (session_token, session_permissions)
+        """
+        try:
+            with open(token_file) as f:
+                d = json.load(f)
+        except FileNotFoundError:
+            return (None, None)
+
+        if "session_token" not in d or d.get("session_base_url") != base_url:
+            return (None, None)
+        return (d["session_token"], d.get("session_permissions"))
+
     def _get_base_url(self, host: str, port: str, api_version: str) -> str:
         """
         Returns base url for HTTPS requests
@@ -3,7 +3,11 @@ Call API.
 https://dev.freebox.fr/sdk/os/call/
 """
 
+from typing import Any
+
 from freebox_api.access import Access
+from freebox_api.models import CallLogEntry
+from freebox_api.models import decode
 
 
 class Call:
@@ -36,11 +40,20 @@ class Call:
         """
         return await self._access.get(f"call/log/{log_id}")
 
-    async def get_calls_log(self):
+    async def get_calls_log(
+        self, as_model: bool | None = None
+    ) -> list[dict[str, Any]] | list[CallLogEntry] | None:
         """
         Get calls logs
+
+        as_model : `bool`, optional
+            Return `CallLogEntry` models, default to the access setting
         """
-        return await self._access.get("call/log/")
+        return decode(
+            await self._access.get("call/log/"),
+            CallLogEntry,
+            self._access.use_models if as_model is None else as_model,
+        )
 
     async def mark_calls_log_as_read(self):
         """
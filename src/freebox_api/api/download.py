@@ -3,8 +3,20 @@ Download API.
 https://dev.freebox.fr/sdk/os/download/
 """
 
+import asyncio
 import base64
+import hashlib
+import os
+import re
 import sys
+from collections.abc import AsyncIterable
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from collections.abc import Coroutine
+from collections.abc import Iterable
+from http import HTTPStatus
+from typing import BinaryIO
+from typing import Union
 
 if sys.version_info < (3, 11):
     from typing_extensions import Required
@@ -14,7 +26,74 @@ else:
     from typing import TypedDict
 from typing import Any
 
+from aiohttp import ClientError
+from aiohttp import ClientResponse
+from aiohttp import FormData
+
 from freebox_api.access import Access
+from freebox_api.exceptions import DownloadVerificationError
+from freebox_api.exceptions import HttpRequestError
+from freebox_api.models import DownloadTask
+from freebox_api.models import decode
+
+_DEFAULT_CHUNK_SIZE = 1024 * 1024
+_DEFAULT_CONNECTIONS = 4
+_DEFAULT_UPLOAD_CONCURRENCY = 4
+
+# Called with (downloaded_bytes, total_bytes or None if unknown)
+ProgressCallback = Callable[[int, int | None], None]
+
+# Local file path, or async byte source
+UploadSource = Union[str, "os.PathLike[str]", AsyncIterable[bytes]]
+
+
+def _open_local_file(dest: str | os.PathLike[str], resume: bool) -> BinaryIO:
+    """
+    Open a local file for writing, positioned at its end if resuming
+    """
+    if resume and os.path.exists(dest):
+        file = open(dest, "r+b")
+        file.seek(0, os.SEEK_END)
+        return file
+    return open(dest, "wb")
+
+
+def _preallocate_local_file(dest: str | os.PathLike[str], size: int) -> None:
+    """
+    Create or truncate a local file to the given size
+    """
+    with open(dest, "wb") as file:
+        file.truncate(size)
+
+
+def _hash_local_file(dest: str | os.PathLike[str], hash_type: str) -> str:
+    """
+    Returns the hex digest of a local file
+    """
+    digest = hashlib.new(hash_type)
+    with open(dest, "rb") as file:
+        while chunk := file.read(_DEFAULT_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def _run_all(coros: Iterable[Coroutine[Any, Any, None]]) -> None:
+    """
+    Run coroutines concurrently, cancelling and awaiting the others on the
+    first failure, as a TaskGroup does
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks:
+            if task.done() and not task.cancelled():
+                error = task.exception()
+                if error is not None:
+                    raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 
 class _DownloadAddURL(TypedDict, total=False):
@@ -122,11 +201,20 @@ class Download:
     }
     mark_item_as_read_schema = {"is_read": True}
 
-    async def get_download_tasks(self) -> dict[str, Any]:
+    async def get_download_tasks(
+        self, as_model: bool | None = None
+    ) -> list[dict[str, Any]] | list[DownloadTask] | None:
         """
         Get downloads
+
+        as_model : `bool`, optional
+            Return `DownloadTask` models, default to the access setting
         """
-        return await self._access.get("downloads/")  # type: ignore
+        return decode(
+            await self._access.get("downloads/"),
+            DownloadTask,
+            self._access.use_models if as_model is None else as_model,
+        )
 
     async def get_download_task(self, download_id: int) -> dict[str, Any]:
         """
@@ -254,6 +342,96 @@ class Download:
             download_params["archive_password"] = archive_password
         return await self.add_download_task(download_params)
 
+    async def add_download_task_from_upload(
+        self,
+        source: UploadSource,
+        filename: str | None = None,
+        download_dir: str | None = None,
+        archive_password: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Add download from a torrent or nzb file, streamed as
+        multipart/form-data without loading it in memory
+
+        source : `str`, `PathLike` or async iterable of `bytes`
+            Local file path, or async byte source
+        filename : `str`, optional
+            Name of the uploaded file, default to the name of the local file
+            (required for async byte sources)
+        download_dir : `str`, optional
+            Default to None
+        archive_password : `str`, optional
+            Default to None
+        """
+        if isinstance(source, (str, os.PathLike)):
+            filename = filename or os.path.basename(source)
+        elif filename is None:
+            raise ValueError("A filename is required to upload an async byte source")
+        source_sent = False
+
+        async def build_form() -> FormData:
+            nonlocal source_sent
+            content: BinaryIO | AsyncIterable[bytes]
+            if isinstance(source, (str, os.PathLike)):
+                content = await asyncio.to_thread(open, source, "rb")
+            elif source_sent:
+                # Only happens if the session expired during the upload
+                raise HttpRequestError(f"Cannot upload {filename} again")
+            else:
+                content = source
+            source_sent = True
+
+            form = FormData()
+            form.add_field(
+                "download_file",
+                content,
+                filename=filename,
+                content_type="application/octet-stream",
+            )
+            if download_dir:
+                form.add_field("download_dir", download_dir)
+            if archive_password:
+                form.add_field("archive_password", archive_password)
+            return form
+
+        return await self._access.post_multipart("downloads/add/", build_form)
+
+    async def add_download_tasks_from_uploads(
+        self,
+        sources: Iterable[str | os.PathLike[str]],
+        download_dir: str | None = None,
+        concurrency: int = _DEFAULT_UPLOAD_CONCURRENCY,
+    ) -> list[dict[str, Any] | Exception]:
+        """
+        Add downloads from many torrent or nzb files, uploading at most
+        `concurrency` of them at once
+
+        Returns the result of each upload, in order, or the error it raised.
+
+        sources : iterable of `str` or `PathLike`
+        download_dir : `str`, optional
+            Default to None
+        concurrency : `int`, optional
+            Default to 4
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload(source: str | os.PathLike[str]) -> dict[str, Any] | Exception:
+            async with semaphore:
+                try:
+                    return await self.add_download_task_from_upload(
+                        source, download_dir=download_dir
+                    )
+                except (
+                    HttpRequestError,
+                    ClientError,
+                    OSError,
+                    asyncio.TimeoutError,
+                ) as err:
+                    return err
+
+        return list(await asyncio.gather(*(upload(source) for source in sources)))
+
     # Download Stats
 
     async def get_download_stats(self) -> dict[str, Any]:
@@ -525,5 +703,259 @@ class Download:
 
         file_path : `str`
         """
+        return await self._access.get(self._get_file_url(file_path))  # type: ignore
+
+    def _get_file_url(self, file_path: str) -> str:
         path_b64 = base64.b64encode(file_path.encode("utf-8")).decode("utf-8")
-        return await self._access.get(f"dl/{path_b64}")  # type: ignore
+        return f"dl/{path_b64}"
+
+    async def _open_file(
+        self, file_path: str, offset: int = 0, end: int | None = None
+    ) -> tuple[ClientResponse, int, int | None]:
+        """
+        Open a file download from the given offset, up to the given end
+        position included
+        Returns (response, offset, total_size)
+
+        The returned offset is 0 if the server ignored the requested range.
+        If the file ends at the given offset, the response is released and
+        has a REQUESTED_RANGE_NOT_SATISFIABLE status.
+        """
+        headers = None
+        if offset or end is not None:
+            headers = {"Range": f"bytes={offset}-{'' if end is None else end}"}
+        resp = await self._access.get_raw(
+            self._get_file_url(file_path),
+            headers,
+            allowed_statuses=(
+                (HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,)
+                if offset and end is None
+                else ()
+            ),
+        )
+
+        if resp.status == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+            resp.release()
+            # Content-Range: bytes */<total>
+            match = re.fullmatch(
+                r"bytes \*/(\d+)", resp.headers.get("Content-Range", "")
+            )
+            if match is None or int(match[1]) != offset:
+                raise HttpRequestError(
+                    f"Invalid range {offset}- for {file_path} "
+                    f"(Content-Range: {resp.headers.get('Content-Range')})"
+                )
+            return (resp, offset, offset)
+
+        if resp.status != HTTPStatus.PARTIAL_CONTENT:
+            return (resp, 0, resp.content_length)
+
+        # Content-Range: bytes <start>-<end>/<total>
+        match = re.match(
+            r"bytes (\d+)-\d+/(\d+|\*)", resp.headers.get("Content-Range", "")
+        )
+        if match is None:
+            resp.release()
+            raise HttpRequestError(f"Invalid range response for {file_path}")
+        total = int(match[2]) if match[2] != "*" else None
+        return (resp, int(match[1]), total)
+
+    async def stream_file(
+        self,
+        file_path: str,
+        chunk_size: int = _DEFAULT_CHUNK_SIZE,
+        offset: int = 0,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a file from the Freebox disk, without buffering it
+
+        file_path : `str`
+        chunk_size : `int`, optional
+            Maximum size of the yielded chunks, default to 1 MiB
+        offset : `int`, optional
+            Position to start from, default to 0
+        """
+        resp, start, _ = await self._open_file(file_path, offset)
+        try:
+            if resp.status == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+                # Nothing left past the offset
+                return
+            if start != offset:
+                raise HttpRequestError(f"Range requests not supported for {file_path}")
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                yield chunk
+        finally:
+            resp.release()
+
+    async def save_file(
+        self,
+        file_path: str,
+        dest: str | os.PathLike[str] | BinaryIO,
+        chunk_size: int = _DEFAULT_CHUNK_SIZE,
+        resume: bool = False,
+        progress_callback: ProgressCallback | None = None,
+    ) -> int:
+        """
+        Download a file from the Freebox disk to a local file, without
+        buffering it. Returns the size of the local file.
+
+        file_path : `str`
+        dest : `str`, `PathLike` or binary file object
+            Local path, or file object to write to from its current position
+        chunk_size : `int`, optional
+            Default to 1 MiB
+        resume : `bool`, optional
+            Continue a partial download from the size of the local file,
+            or from the current position of the file object, default to False
+        progress_callback : `ProgressCallback`, optional
+            Called after each chunk with (downloaded_bytes, total_bytes)
+        """
+        if isinstance(dest, (str, os.PathLike)):
+            file = await asyncio.to_thread(_open_local_file, dest, resume)
+            try:
+                return await self.save_file(
+                    file_path, file, chunk_size, resume, progress_callback
+                )
+            finally:
+                await asyncio.to_thread(file.close)
+
+        offset = dest.tell() if resume else 0
+        resp, start, total = await self._open_file(file_path, offset)
+        try:
+            if resp.status == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+                # Already complete
+                if progress_callback is not None:
+                    progress_callback(offset, total)
+                return offset
+            if offset and resp.status != HTTPStatus.PARTIAL_CONTENT:
+                # Range ignored by the server, download from scratch
+                await asyncio.to_thread(dest.seek, 0)
+                await asyncio.to_thread(dest.truncate)
+            elif start != offset:
+                raise HttpRequestError(
+                    f"Unexpected range response for {file_path} "
+                    f"(start: {start}, expected: {offset})"
+                )
+            if total is None and resp.content_length is not None:
+                total = start + resp.content_length
+
+            downloaded = start
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                await asyncio.to_thread(dest.write, chunk)
+                downloaded += len(chunk)
+                if progress_callback is not None:
+                    progress_callback(downloaded, total)
+        finally:
+            resp.release()
+
+        return downloaded
+
+    async def save_file_parallel(
+        self,
+        file_path: str,
+        dest: str | os.PathLike[str],
+        *,
+        connections: int = _DEFAULT_CONNECTIONS,
+        chunk_size: int = _DEFAULT_CHUNK_SIZE,
+        hash_type: str = "sha1",
+        expected_hash: str | None = None,
+        progress_callback: ProgressCallback | None = None,
+    ) -> int:
+        """
+        Download a file from the Freebox disk to a local path, fetching
+        byte ranges over several concurrent connections.
+        Returns the size of the local file.
+
+        The local file is preallocated and each range is written at its
+        offset. If the server does not support ranges, falls back to a
+        single stream download.
+
+        file_path : `str`
+        dest : `str` or `PathLike`
+        connections : `int`, optional
+            Number of concurrent ranges, default to 4
+        chunk_size : `int`, optional
+            Default to 1 MiB
+        hash_type : `str`, optional
+            Hash algorithm of `expected_hash` (md5, sha1, sha256, sha512),
+            default to sha1
+        expected_hash : `str`, optional
+            Digest to verify the local file against, for example from
+            `Fs.get_file_hash`, default to None
+        progress_callback : `ProgressCallback`, optional
+            Called after each chunk with (downloaded_bytes, total_bytes)
+        """
+        total = None
+        try:
+            resp, _, total = await self._open_file(file_path, 0, 0)
+            resp.release()
+            if resp.status != HTTPStatus.PARTIAL_CONTENT:
+                total = None
+        except HttpRequestError:
+            # Ranges not supported (for instance on an empty file)
+            pass
+
+        if total is None:
+            size = await self.save_file(
+                file_path, dest, chunk_size, progress_callback=progress_callback
+            )
+        else:
+            await asyncio.to_thread(_preallocate_local_file, dest, total)
+            range_size = -(-total // max(connections, 1))
+            downloaded = [0]
+
+            def on_chunk(length: int) -> None:
+                downloaded[0] += length
+                if progress_callback is not None:
+                    progress_callback(downloaded[0], total)
+
+            # Do not let the other ranges write to the file after a failure
+            await _run_all(
+                self._save_file_range(
+                    file_path,
+                    dest,
+                    offset,
+                    min(offset + range_size, total) - 1,
+                    chunk_size=chunk_size,
+                    on_chunk=on_chunk,
+                )
+                for offset in range(0, total, range_size)
+            )
+            size = total
+
+        if expected_hash is not None:
+            digest = await asyncio.to_thread(_hash_local_file, dest, hash_type)
+            if digest.lower() != expected_hash.lower():
+                raise DownloadVerificationError(
+                    f"{hash_type} mismatch for {file_path}: "
+                    f"expected {expected_hash}, got {digest}"
+                )
+        return size
+
+    async def _save_file_range(
+        self,
+        file_path: str,
+        dest: str | os.PathLike[str],
+        offset: int,
+        end: int,
+        *,
+        chunk_size: int,
+        on_chunk: Callable[[int], None],
+    ) -> None:
+        """
+        Download a byte range of a file into the same range of a local file
+        """
+        resp, start, _ = await self._open_file(file_path, offset, end)
+        try:
+            if start != offset:
+                raise HttpRequestError(f"Range requests not supported for {file_path}")
+            file = await asyncio.to_thread(open, dest, "r+b")
+            try:
+                await asyncio.to_thread(file.seek, offset)
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    await asyncio.to_thread(file.write, chunk)
+                    on_chunk(len(chunk))
+            finally:
+                await asyncio.to_thread(file.close)
+        finally:
+            resp.release()
@@ -0,0 +1,189 @@
+"""
+Events API.
+https://dev.freebox.fr/sdk/os/#websocket-notification-api
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+from typing import TypedDict
+
+from aiohttp import ClientError
+from aiohttp import ClientWebSocketResponse
+from aiohttp import WSMsgType
+
+from freebox_api.access import Access
+from freebox_api.exceptions import AuthorizationError
+
+logger = logging.getLogger(__name__)
+
+_EVENTS_URL = "ws/event"
+_DEFAULT_EVENT_QUEUE_SIZE = 256
+_HEARTBEAT = 30
+_MIN_RECONNECT_DELAY = 1
+_MAX_RECONNECT_DELAY = 60
+
+LAN_HOST_EVENTS = ["lan_host_l3addr_reachable", "lan_host_l3addr_unreachable"]
+VM_EVENTS = ["vm_state_changed", "vm_disk_task_done"]
+
+
+class Event(TypedDict):
+    """
+    Event notified by the freebox
+    """
+
+    source: str
+    event: str
+    result: Any
+
+
+class Events:
+    """
+    Events
+
+    Events are pushed by the freebox through a single websocket, opened while
+    at least one iterator is running. The websocket is opened again whenever
+    it is closed, for instance when the session expires, and the events of
+    the running iterators are registered again.
+    """
+
+    def __init__(
+        self, access: Access, queue_size: int = _DEFAULT_EVENT_QUEUE_SIZE
+    ) -> None:
+        self._access = access
+        self.queue_size = queue_size
+        # Events of each running iterator, by iterator queue, in which None
+        # stops the iterator
+        self._subscribers: dict[asyncio.Queue[Event | None], frozenset[str]] = {}
+        self._ws: ClientWebSocketResponse | None = None
+        self._task: asyncio.Task[None] | None = None
+        self.reconnect_count = 0
+        # Number of events dropped as an iterator was not consumed fast enough
+        self.dropped_count = 0
+
+    async def iter_events(self, *events: str) -> AsyncIterator[Event]:
+        """
+        Yield the given events as they are notified
+
+        If the iterator is not consumed fast enough, its oldest events are
+        dropped rather than holding back the other iterators. The iterator
+        stops when the events are closed.
+
+        events : `str`
+            Event names, e.g. `lan_host_l3addr_reachable`
+        """
+        queue: asyncio.Queue[Event | None] = asyncio.Queue(self.queue_size)
+        self._subscribers[queue] = frozenset(events)
+        try:
+            if self._task is None:
+                self._task = asyncio.ensure_future(self._run())
+            elif self._ws is not None:
+                await self._register(self._ws)
+
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            del self._subscribers[queue]
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+    def iter_lan_host_events(self) -> AsyncIterator[Event]:
+        """
+        Yield the LAN hosts reachability changes
+        """
+        return self.iter_events(*LAN_HOST_EVENTS)
+
+    def iter_vm_events(self) -> AsyncIterator[Event]:
+        """
+        Yield the virtual machines state changes and disk tasks completions
+        """
+        return self.iter_events(*VM_EVENTS)
+
+    async def close(self) -> None:
+        """
+        Close the websocket and stop the running iterators
+        """
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        for queue in self._subscribers:
+            self._put(queue, None)
+
+    async def _run(self) -> None:
+        """
+        Receive events, opening the websocket again when closed
+        """
+        delay = _MIN_RECONNECT_DELAY
+        while True:
+            try:
+                ws = await self._access.ws_connect(_EVENTS_URL, heartbeat=_HEARTBEAT)
+            except (AuthorizationError, ClientError, asyncio.TimeoutError) as err:
+                logger.warning("Unable to open events websocket: %s", err)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+                continue
+
+            self._ws = ws
+            try:
+                await self._register(ws)
+                async for msg in ws:
+                    # Only back off again from the start once the websocket
+                    # proved usable
+                    delay = _MIN_RECONNECT_DELAY
+                    if msg.type != WSMsgType.TEXT:
+                        continue
+                    try:
+                        self._handle_message(json.loads(msg.data))
+                    except (ValueError, KeyError, TypeError) as err:
+                        logger.warning(
+                            "Invalid events websocket message %r: %s", msg.data, err
+                        )
+            except ClientError as err:
+                logger.warning("Events websocket failed: %s", err)
+            finally:
+                self._ws = None
+                await ws.close()
+
+            logger.debug("Events websocket closed")
+            self.reconnect_count += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+
+    async def _register(self, ws: ClientWebSocketResponse) -> None:
+        """
+        Register the events of every running iterator
+        """
+        events = set().union(*self._subscribers.values())
+        await ws.send_json({"action": "register", "events": sorted(events)})
+
+    def _handle_message(self, message: Any) -> None:
+        if not isinstance(message, dict):
+            raise TypeError("message is not an object")
+        if not message.get("success"):
+            logger.warning("Events websocket error: %s", json.dumps(message))
+            return
+        if message.get("action") != "notification":
+            return
+
+        event: Event = {
+            "source": message["source"],
+            "event": message["event"],
+            "result": message.get("result"),
+        }
+        name = f"{event['source']}_{event['event']}"
+        for queue, events in self._subscribers.items():
+            if name in events:
+                self._put(queue, event)
+
+    def _put(self, queue: asyncio.Queue[Event | None], event: Event | None) -> None:
+        """
+        Queue an event, dropping the oldest one if the queue is full
+        """
+        if queue.full():
+            queue.get_nowait()
+            self.dropped_count += 1
+        queue.put_nowait(event)
@@ -3,15 +3,71 @@ File System API.
 https://dev.freebox.fr/sdk/os/fs/
 """
 
+import asyncio
 import base64
 import logging
 import os
+import posixpath
+from collections.abc import AsyncIterable
+from collections.abc import AsyncIterator
+from collections.abc import Iterable
+from fnmatch import fnmatchcase
+from typing import Any
+
+from aiohttp import ClientError
 
 import freebox_api.exceptions
 from freebox_api.access import Access
 
 logger = logging.getLogger(__name__)
 
+_MIN_TASK_POLL_INTERVAL = 0.5
+_MAX_TASK_POLL_INTERVAL = 10
+_TASK_POLL_BACKOFF = 1.5
+_DEFAULT_WALK_CONCURRENCY = 4
+_DEFAULT_HASH_CONCURRENCY = 4
+
+# File path, or (path, entry) yielded by Fs.walk
+PathOrEntry = str | tuple[str, dict[str, Any]]
+
+# Errors of a request to the Freebox
+_REQUEST_ERRORS = (
+    freebox_api.exceptions.HttpRequestError,
+    ClientError,
+    asyncio.TimeoutError,
+)
+
+
+def _match_any(name: str, patterns: list[str] | None, default: bool) -> bool:
+    """
+    Returns True if the name matches one of the glob patterns,
+    or `default` if there are no patterns
+    """
+    if not patterns:
+        return default
+    return any(fnmatchcase(name, pattern) for pattern in patterns)
+
+
+async def _iter_file_paths(
+    items: Iterable[PathOrEntry] | AsyncIterable[PathOrEntry],
+) -> AsyncIterator[str]:
+    """
+    Iterate asynchronously over file paths, or over the (path, entry) yielded
+    by `Fs.walk` skipping entries other than files
+    """
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            if isinstance(item, str):
+                yield item
+            elif item[1].get("type") == "file":
+                yield item[0]
+    else:
+        for item in items:
+            if isinstance(item, str):
+                yield item
+            elif item[1].get("type") == "file":
+                yield item[0]
+
 
 class Fs:
     """
@@ -21,6 +77,7 @@ class Fs:
     def __init__(self, access: Access):
         self._access = access
         self._path = "/"
+        self.task_tracker = FsTaskTracker(self)
 
     archive_schema = {"dst": "", "files": [""]}
 
@@ -103,6 +160,13 @@ class Fs:
         path_b64 = base64.b64encode(path.encode("utf-8")).decode("utf-8")
         return await self._access.get(f"fs/ls/{path_b64}")
 
+    async def get_info(self, path):
+        """
+        Returns information about the given file or directory itself
+        """
+        path_b64 = base64.b64encode(path.encode("utf-8")).decode("utf-8")
+        return await self._access.get(f"fs/info/{path_b64}")
+
     async def get_hash(self, hash_id):
         """
         Get the hash value
@@ -114,6 +178,137 @@ class Fs:
         """
         return await self._access.get(f"fs/tasks/{hash_id}/hash")
 
+    async def get_task(self, task_id):
+        """
+        Returns the task with the given id
+        """
+        return await self._access.get(f"fs/tasks/{task_id}")
+
+    async def get_file_hash(self, src, hash_type="sha1"):
+        """
+        Hash a file and wait for its hash value
+
+        The hash task is deleted once done.
+
+        src : `str`
+            The file with its path
+        hash_type : `str`
+            The type of hash (md5, sha1, ...)
+        """
+        task = await self.hash_file(src, hash_type)
+        try:
+            await self.task_tracker.wait(task)
+            return await self.get_hash(task["id"])
+        finally:
+            await self.delete_file_task(task["id"])
+
+    async def hash_files(
+        self,
+        paths: Iterable[PathOrEntry] | AsyncIterable[PathOrEntry],
+        hash_type: str = "sha1",
+        concurrency: int = _DEFAULT_HASH_CONCURRENCY,
+    ) -> AsyncIterator[tuple[str, str | None]]:
+        """
+        Hash many files, with at most `concurrency` hash tasks at once on
+        the Freebox, and yield (path, hash value) as each one completes
+
+        The hash value is None if the Freebox failed to hash the file, other
+        errors are raised. Hash tasks are deleted once done.
+
+        paths : iterable or async iterable of `str` or (path, entry)
+            The files with their paths, or the (path, entry) yielded by `walk`
+            whose entries other than files are skipped
+        hash_type : `str`
+            The type of hash (md5, sha1, ...)
+        concurrency : `int`
+            Default to 4
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        # Bounded, so that hashing pauses when the consumer is slow
+        results: asyncio.Queue[tuple[str, str | None] | Exception | None] = (
+            asyncio.Queue(maxsize=concurrency)
+        )
+        hashing: set[asyncio.Future[None]] = set()
+
+        async def submit():
+            try:
+                async for path in _iter_file_paths(paths):
+                    await semaphore.acquire()
+                    task = asyncio.ensure_future(
+                        self._hash_into(path, hash_type, results, semaphore)
+                    )
+                    hashing.add(task)
+                    task.add_done_callback(hashing.discard)
+                if hashing:
+                    await asyncio.wait(set(hashing))
+            except Exception as err:
+                # Error of the paths iterable, raised to the consumer
+                await results.put(err)
+            else:
+                await results.put(None)
+
+        submitter = asyncio.ensure_future(submit())
+        try:
+            while (result := await results.get()) is not None:
+                if isinstance(result, Exception):
+                    raise result
+                yield result
+        finally:
+            submitter.cancel()
+            for task in hashing:
+                task.cancel()
+
+    async def _hash_into(self, path, hash_type, results, semaphore):
+        """
+        Put (path, hash value) or the unexpected error into the results queue,
+        then release the semaphore acquired by hash_files
+        """
+        result: tuple[str, str | None] | Exception
+        try:
+            try:
+                result = (path, await self._get_file_hash_or_none(path, hash_type))
+            except Exception as err:
+                # Raised to the consumer
+                result = err
+            await results.put(result)
+        finally:
+            semaphore.release()
+
+    async def _get_file_hash_or_none(self, path, hash_type):
+        """
+        Returns the hash value of a file, or None if the Freebox failed
+        """
+        try:
+            return await self.get_file_hash(path, hash_type)
+        except _REQUEST_ERRORS as err:
+            logger.warning("Hashing %s failed: %s", path, err)
+            return None
+
+    async def hash_directory(
+        self,
+        path: str,
+        hash_type: str = "sha1",
+        concurrency: int = _DEFAULT_HASH_CONCURRENCY,
+    ) -> AsyncIterator[tuple[str, str | None]]:
+        """
+        Hash the files of a directory, see `hash_files`
+
+        path : `str`
+            The directory
+        hash_type : `str`
+            The type of hash (md5, sha1, ...)
+        concurrency : `int`
+            Default to 4
+        """
+        entries = await self.list_files(path)
+        files = [
+            posixpath.join(path, entry["name"])
+            for entry in entries or []
+            if entry["type"] == "file"
+        ]
+        async for result in self.hash_files(files, hash_type, concurrency):
+            yield result
+
     async def get_tasks_list(self):
         """
         Returns the collection of all tasks
@@ -129,11 +324,11 @@ class Fs:
         hash_type : `str`
             The type of hash (md5, sha1, ...)
         """
-        self.hash_file_schema["src"] = base64.b64encode(src.encode("utf-8")).decode(
-            "utf-8"
-        )
-        self.hash_file_schema["hash_type"] = hash_type
-        return await self._access.post("fs/hash/", self.hash_file_schema)
+        hash_file = {
+            "src": base64.b64encode(src.encode("utf-8")).decode("utf-8"),
+            "hash_type": hash_type,
+        }
+        return await self._access.post("fs/hash/", hash_file)
 
     async def list_files(self, path, remove_hidden=0, count_sub_folder=0):
         """
@@ -145,6 +340,95 @@ class Fs:
             f"&countSubFolder={1 if count_sub_folder else 0}"
         )
 
+    async def walk(
+        self,
+        path: str,
+        *,
+        max_depth: int | None = None,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        remove_hidden: bool = False,
+        concurrency: int = _DEFAULT_WALK_CONCURRENCY,
+        skip_errors: bool = False,
+    ) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Walk a directory tree breadth-first, listing up to `concurrency`
+        directories at once, and yield (path, entry) for each entry as soon
+        as its directory is listed
+
+        path : `str`
+            The directory to walk
+        max_depth : `int`, optional
+            Number of subdirectory levels to descend into, 0 lists only `path`,
+            default to None (unlimited)
+        include : `list[str]`, optional
+            Only yield entries whose name matches one of these glob patterns,
+            directories are walked regardless, default to None (all entries)
+        exclude : `list[str]`, optional
+            Neither yield nor walk entries whose name matches one of these
+            glob patterns, default to None
+        remove_hidden : `bool`, optional
+            Default to False
+        concurrency : `int`, optional
+            Default to 4
+        skip_errors : `bool`, optional
+            Log and skip the directories which cannot be listed rather than
+            raising the error, default to False
+        """
+        directories: asyncio.Queue[tuple[str, int]] = asyncio.Queue()
+        # Bounded, so that listing pauses when the consumer is slow
+        listings: asyncio.Queue[tuple[str, int, Any]] = asyncio.Queue(
+            maxsize=concurrency
+        )
+
+        directories.put_nowait((path, 0))
+        pending = 1
+        workers = [
+            asyncio.ensure_future(
+                self._list_directories(directories, listings, remove_hidden)
+            )
+            for _ in range(concurrency)
+        ]
+        try:
+            while pending:
+                directory, depth, entries = await listings.get()
+                pending -= 1
+                if isinstance(entries, Exception):
+                    if not skip_errors or not isinstance(entries, _REQUEST_ERRORS):
+                        raise entries
+                    logger.warning("Unable to list %s: %s", directory, entries)
+                    continue
+
+                for entry in entries or []:
+                    name = entry["name"]
+                    if name in (".", "..") or _match_any(name, exclude, False):
+                        continue
+
+                    entry_path = posixpath.join(directory, name)
+                    if entry["type"] == "dir" and (
+                        max_depth is None or depth < max_depth
+                    ):
+                        directories.put_nowait((entry_path, depth + 1))
+                        pending += 1
+                    if _match_any(name, include, True):
+                        yield (entry_path, entry)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _list_directories(self, directories, listings, remove_hidden):
+        """
+        List the queued directories into the listings queue, forever
+        """
+        while True:
+            directory, depth = await directories.get()
+            try:
+                entries = await self.list_files(directory, remove_hidden)
+            except Exception as err:
+                # Raised by walk, so that it does not wait for this listing
+                entries = err
+            await listings.put((directory, depth, entries))
+
     async def ls(self):
         """
         List directory
@@ -164,10 +448,8 @@ class Fs:
         path : `str`
             The path to create
         """
-        self.create_path_schema["path"] = base64.b64encode(path.encode("utf-8")).decode(
-            "utf-8"
-        )
-        return await self._access.post("fs/mkpath/", self.create_path_schema)
+        create_path = {"path": base64.b64encode(path.encode("utf-8")).decode("utf-8")}
+        return await self._access.post("fs/mkpath/", create_path)
 
     async def mv(self, move):
         """
@@ -184,11 +466,11 @@ class Fs:
         dst : `str`
             The new file name
         """
-        self.rename_schema["src"] = base64.b64encode(src.encode("utf-8")).decode(
-            "utf-8"
-        )
-        self.rename_schema["dst"] = dst
-        return await self._access.post("fs/rename/", self.rename_schema)
+        rename = {
+            "src": base64.b64encode(src.encode("utf-8")).decode("utf-8"),
+            "dst": dst,
+        }
+        return await self._access.post("fs/rename/", rename)
 
     async def rm(self, remove):
         """
@@ -201,3 +483,125 @@ class Fs:
         Set file task state
         """
         return await self._access.put(f"fs/tasks/{task_id}", update_task_state)
+
+
+class FsTaskTracker:
+    """
+    Tracks any number of file system tasks with a single polling loop
+
+    Each poll lists all tasks at once. The poll interval is reset to
+    `min_interval` whenever a tracked task progresses, and grows up to
+    `max_interval` while none does.
+    """
+
+    def __init__(
+        self,
+        fs: Fs,
+        min_interval: float = _MIN_TASK_POLL_INTERVAL,
+        max_interval: float = _MAX_TASK_POLL_INTERVAL,
+    ) -> None:
+        self._fs = fs
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._futures: dict[int, asyncio.Future[dict[str, Any]]] = {}
+        self._progress: dict[int, tuple[Any, ...]] = {}
+        self._poller: asyncio.Task[None] | None = None
+
+    def track(self, task: dict[str, Any] | int) -> asyncio.Future[dict[str, Any]]:
+        """
+        Returns a future resolving to the task once done,
+        or raising FsTaskError if it failed
+
+        task : `dict` or `int`
+            A task returned by Fs (cp, mv, archive_files...) or its id
+        """
+        task_id = task if isinstance(task, int) else task["id"]
+        future = self._futures.get(task_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[task_id] = future
+        if isinstance(task, dict):
+            self._update(task)
+
+        if self._futures and (self._poller is None or self._poller.done()):
+            self._poller = asyncio.ensure_future(self._poll())
+        return future
+
+    async def wait(self, task: dict[str, Any] | int) -> dict[str, Any]:
+        """
+        Wait for the task to be done and return it
+
+        task : `dict` or `int`
+            A task returned by Fs (cp, mv, archive_files...) or its id
+        """
+        # Shield the shared future so a cancelled caller does not cancel it
+        return await asyncio.shield(self.track(task))
+
+    def _update(self, task: dict[str, Any]) -> bool:
+        """
+        Update a tracked task, resolving its future once finished
+        Returns True if the task progressed
+        """
+        task_id = task["id"]
+        progress = (task.get("state"), task.get("progress"))
+        progressed = self._progress.get(task_id) != progress
+        self._progress[task_id] = progress
+
+        if task.get("state") == "done":
+            self._finish(task_id, result=task)
+        elif task.get("state") == "failed":
+            self._finish(
+                task_id,
+                error=freebox_api.exceptions.FsTaskError(
+                    f"Task {task_id} failed (error: {task.get('error')})"
+                ),
+            )
+        return progressed
+
+    def _finish(self, task_id, result=None, error=None):
+        future = self._futures.pop(task_id, None)
+        self._progress.pop(task_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def _poll(self) -> None:
+        try:
+            await self._poll_tasks()
+        except Exception as err:
+            # Do not leave the waiting callers hanging
+            logger.exception("Tracking file system tasks failed")
+            for task_id in list(self._futures):
+                self._finish(task_id, error=err)
+
+    async def _poll_tasks(self) -> None:
+        interval = self.min_interval
+        while self._futures:
+            await asyncio.sleep(interval)
+            try:
+                tasks = await self._fs.get_tasks_list() or []
+            except _REQUEST_ERRORS as err:
+                logger.warning("Listing file system tasks failed: %s", err)
+                interval = min(interval * _TASK_POLL_BACKOFF, self.max_interval)
+                continue
+            tasks_by_id = {task["id"]: task for task in tasks}
+            progressed = False
+            for task_id in list(self._futures):
+                task = tasks_by_id.get(task_id)
+                if task is None:
+                    self._finish(
+                        task_id,
+                        error=freebox_api.exceptions.FsTaskError(
+                            f"Task {task_id} not found"
+                        ),
+                    )
+                    continue
+                progressed |= self._update(task)
+
+            if progressed:
+                interval = self.min_interval
+            else:
+                interval = min(interval * _TASK_POLL_BACKOFF, self.max_interval)
@@ -3,7 +3,40 @@ Home API.
 No public documentation available yet.
 """
 
+import asyncio
+import logging
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any
+
+from aiohttp import ClientError
+from aiohttp import ClientResponse
+
 from freebox_api.access import Access
+from freebox_api.exceptions import HttpRequestError
+
+logger = logging.getLogger(__name__)
+
+_HLS_CHUNK_SIZE = 64 * 1024
+_HLS_PREFETCH = 2
+_HLS_DEFAULT_TARGET_DURATION = 2.0
+# Number of segment names remembered to skip the ones already streamed
+_HLS_SEEN_SEGMENTS = 64
+
+
+def _parse_m3u8(playlist: str) -> tuple[float, list[str]]:
+    """
+    Returns (target_duration, segment_names) of a media playlist
+    """
+    target_duration = _HLS_DEFAULT_TARGET_DURATION
+    segments = []
+    for raw_line in playlist.splitlines():
+        line = raw_line.strip()
+        if line.startswith("#EXT-X-TARGETDURATION:"):
+            target_duration = float(line.split(":", 1)[1])
+        elif line and not line.startswith("#"):
+            segments.append(line)
+    return (target_duration, segments)
 
 
 # Home structure : adapter > node > endpoint
@@ -14,6 +47,7 @@ class Home:
 
     def __init__(self, access: Access):
         self._access = access
+        self._cameras: list[dict[str, Any]] | None = None
 
     home_endpoint_value_schema = {"value": None}
 
@@ -69,8 +103,42 @@ class Home:
     async def get_camera(self):
         """
         Get camera info
+
+        The result is kept to build snapshot and stream urls.
+        """
+        self._cameras = await self._access.get("camera")
+        return self._cameras
+
+    def invalidate_cameras(self) -> None:
+        """
+        Forget the known cameras, so that the next snapshot or stream
+        request lists them again
         """
-        return await self._access.get("camera")
+        self._cameras = None
+
+    async def _get_camera_resource(self, camera_index, resource, stream=False):
+        """
+        Get a resource next to the stream playlist of a camera
+
+        If `stream` is True, the raw response is returned without reading
+        its body.
+        """
+        cameras = self._cameras
+        if cameras is None or camera_index >= len(cameras):
+            cameras = await self.get_camera()
+        url = cameras[camera_index]["stream_url"].replace("stream.m3u8", resource)[1:]
+        try:
+            if stream:
+                resp = await self._access.get_raw(url)
+            else:
+                resp = await self._access.get(url)
+        except (HttpRequestError, ClientError):
+            # The camera may have been removed or its stream url changed
+            self.invalidate_cameras()
+            raise
+        if isinstance(resp, ClientResponse) and not resp.ok:
+            self.invalidate_cameras()
+        return resp
 
     async def get_camera_snapshot(self, camera_index=0, size=4, quality=5):
         """
@@ -80,11 +148,8 @@ class Home:
         `size`: 2 = 320x240, 3 = 640x480, 4 = 1280x720
         `quality`: quality index, default is 5
         """
-        fbx_cameras = await self.get_camera()
-        return await self._access.get(
-            fbx_cameras[camera_index]["stream_url"].replace(
-                "stream.m3u8", f"snapshot.cgi?size={size}&quality={quality}"
-            )[1:]
+        return await self._get_camera_resource(
+            camera_index, f"snapshot.cgi?size={size}&quality={quality}"
         )
 
     async def get_camera_stream_m3u8(self, camera_index=0, channel=2):
@@ -94,23 +159,101 @@ class Home:
         `camera_index`: ``int``
         `channel`: 1 is SD, 2 is HD
         """
-        fbx_cameras = await self.get_camera()
-        return await self._access.get(
-            fbx_cameras[camera_index]["stream_url"].replace(
-                "stream.m3u8", f"stream.m3u8?channel={channel}"
-            )[1:]
+        return await self._get_camera_resource(
+            camera_index, f"stream.m3u8?channel={channel}"
         )
 
     async def get_camera_ts(self, ts_name, camera_index=0):
         """
         Get camera stream
         """
-        fbx_cameras = await self.get_camera()
-        return await self._access.get(
-            fbx_cameras[camera_index]["stream_url"].replace(
-                "stream.m3u8", f"{ts_name}"
-            )[1:]
+        return await self._get_camera_resource(camera_index, f"{ts_name}")
+
+    async def stream_camera(
+        self,
+        camera_index: int = 0,
+        channel: int = 2,
+        chunk_size: int = _HLS_CHUNK_SIZE,
+        prefetch: int = _HLS_PREFETCH,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a camera live feed
+
+        Yields the raw bytes of the successive MPEG-TS segments, as chunks of
+        at most `chunk_size` bytes. The playlist is polled in the background and
+        up to `prefetch` upcoming segments are requested ahead. Segment bodies
+        are read as they are yielded, so a slow consumer holds the stream back
+        instead of buffering it.
+
+        `camera_index`: ``int``
+        `channel`: 1 is SD, 2 is HD
+        `chunk_size`: ``int``
+        `prefetch`: ``int``
+        """
+        segments: asyncio.Queue[asyncio.Future[ClientResponse] | None] = asyncio.Queue()
+        # Taken by each requested segment until it is dequeued, so that
+        # segments are only requested once there is room for them
+        slots = asyncio.Semaphore(max(prefetch, 1))
+        follower = asyncio.ensure_future(
+            self._follow_camera_playlist(camera_index, channel, segments, slots)
         )
+        try:
+            while True:
+                segment = await segments.get()
+                slots.release()
+                if segment is None:
+                    # Raise the playlist error
+                    follower.result()
+                    return
+                try:
+                    resp = await segment
+                except (HttpRequestError, ClientError, asyncio.TimeoutError) as err:
+                    logger.warning("Skipping camera segment: %s", err)
+                    continue
+                try:
+                    async for chunk in resp.content.iter_chunked(chunk_size):
+                        yield chunk
+                finally:
+                    resp.release()
+        finally:
+            follower.cancel()
+            while not segments.empty():
+                segment = segments.get_nowait()
+                if segment is not None:
+                    segment.cancel()
+                    segment.add_done_callback(_release_segment)
+
+    async def _follow_camera_playlist(self, camera_index, channel, segments, slots):
+        """
+        Poll the playlist of a camera and request its new segments
+        """
+        seen: deque[str] = deque(maxlen=_HLS_SEEN_SEGMENTS)
+        try:
+            while True:
+                resp = await self.get_camera_stream_m3u8(camera_index, channel)
+                if not resp.ok:
+                    raise HttpRequestError(
+                        f"Getting camera playlist failed (status: {resp.status})"
+                    )
+                target_duration, names = _parse_m3u8(await resp.text())
+                new_names = [name for name in names if name not in seen]
+                for name in new_names:
+                    seen.append(name)
+                    await slots.acquire()
+                    segments.put_nowait(
+                        asyncio.ensure_future(
+                            self._get_camera_resource(camera_index, name, stream=True)
+                        )
+                    )
+                # Poll again sooner when the playlist did not change
+                await asyncio.sleep(
+                    target_duration if new_names else target_duration / 2
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            segments.put_nowait(None)
+            raise
 
     async def get_home_endpoint_value(self, node_id, endpoint_id):
         """
@@ -299,3 +442,11 @@ class Home:
         return await self._access.post(
             f"home/pairing/{home_adapter_id}", stop_pairing_step_payload
         )
+
+
+def _release_segment(segment: "asyncio.Future[ClientResponse]") -> None:
+    """
+    Release the response of a segment which will not be streamed
+    """
+    if not segment.cancelled() and segment.exception() is None:
+        segment.result().release()
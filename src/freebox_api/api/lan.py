@@ -3,7 +3,44 @@ LAN API.
 https://dev.freebox.fr/sdk/os/lan/
 """
 
+import asyncio
+from collections.abc import Iterable
+from collections.abc import Mapping
+from typing import Any
+
 from freebox_api.access import Access
+from freebox_api.models import LanHost
+from freebox_api.models import decode
+
+
+def get_host_mac(host: Mapping[str, Any]) -> str:
+    """
+    Returns the MAC address of a LAN host, or its id if it has none
+    """
+    l2ident = host.get("l2ident") or {}
+    if l2ident.get("type") == "mac_address" and l2ident.get("id"):
+        return str(l2ident["id"]).upper()
+    return str(host["id"]).upper()
+
+
+def merge_hosts(
+    hosts_by_interface: Mapping[str, Iterable[dict[str, Any]]],
+) -> dict[str, tuple[str, dict[str, Any]]]:
+    """
+    Returns (interface, host) by MAC address of the hosts of every interface
+
+    A host listed on several interfaces is kept once, preferring the first
+    interface where it is active.
+    """
+    merged: dict[str, tuple[str, dict[str, Any]]] = {}
+    for interface, hosts in hosts_by_interface.items():
+        for host in hosts:
+            mac = get_host_mac(host)
+            if mac not in merged or (
+                host.get("active") and not merged[mac][1].get("active")
+            ):
+                merged[mac] = (interface, host)
+    return merged
 
 
 class Lan:
@@ -59,11 +96,60 @@ class Lan:
         """
         return await self._access.get("lan/browser/interfaces")
 
-    async def get_hosts_list(self, interface="pub"):
+    async def get_hosts_list(
+        self, interface: str = "pub", as_model: bool | None = None
+    ) -> list[dict[str, Any]] | list[LanHost] | None:
         """
         Get the list of hosts on a given interface
+
+        as_model : `bool`, optional
+            Return `LanHost` models, default to the access setting
         """
-        return await self._access.get(f"lan/browser/{interface}")
+        return decode(
+            await self._access.get(f"lan/browser/{interface}"),
+            LanHost,
+            self._access.use_models if as_model is None else as_model,
+        )
+
+    async def get_hosts_by_interface(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Get the lists of hosts of every browsable interface, fetched concurrently
+        """
+        interfaces = await self.get_interfaces() or []
+        hosts_by_interface: dict[str, list[dict[str, Any]]] = {
+            i["name"]: [] for i in interfaces
+        }
+        # Do not request interfaces without hosts
+        names = [i["name"] for i in interfaces if i.get("host_count") != 0]
+        hosts = await asyncio.gather(
+            *(self._access.get(f"lan/browser/{name}") for name in names)
+        )
+        for name, interface_hosts in zip(names, hosts, strict=True):
+            # Interfaces without hosts return no result
+            hosts_by_interface[name] = interface_hosts or []
+        return hosts_by_interface
+
+    async def get_all_hosts(
+        self, as_model: bool | None = None
+    ) -> dict[str, dict[str, Any]] | dict[str, LanHost]:
+        """
+        Get the hosts of every browsable interface by MAC address
+
+        Each host is listed once, with the name of its `interface` added.
+
+        as_model : `bool`, optional
+            Return `LanHost` models, default to the access setting
+        """
+        merged = merge_hosts(await self.get_hosts_by_interface())
+        if self._access.use_models if as_model is None else as_model:
+            return {
+                mac: LanHost.from_dict({**host, "interface": interface})
+                for mac, (interface, host) in merged.items()
+            }
+        return {
+            mac: {**host, "interface": interface}
+            for mac, (interface, host) in merged.items()
+        }
 
     async def get_host_information(self, host_id, interface="pub"):
         """
@@ -3,11 +3,13 @@ Player API.
 No public documentation available yet.
 """
 
+import time
 from typing import Any
 
 from freebox_api.access import Access
 
 _DEFAULT_PLAYER_API_VERSION = "v6"
+_DEFAULT_PLAYERS_CACHE_TTL = 300
 
 
 class Player:
@@ -16,10 +18,16 @@ class Player:
     """
 
     def __init__(
-        self, access: Access, player_api_version: str = _DEFAULT_PLAYER_API_VERSION
+        self,
+        access: Access,
+        player_api_version: str = _DEFAULT_PLAYER_API_VERSION,
+        players_cache_ttl: float = _DEFAULT_PLAYERS_CACHE_TTL,
     ) -> None:
         self._access = access
         self._player_api_version = player_api_version
+        self._players_cache_ttl = players_cache_ttl
+        self._players: list[dict[str, Any]] | None = None
+        self._players_expire_at = 0.0
 
     media_control_seek_args = {"seek_position": 0, "type": "seek_position"}
     media_control_stream = {"quality": "", "source": ""}
@@ -53,15 +61,29 @@ class Player:
     async def get_players(self) -> list[dict[str, Any]]:
         """
         Get players
+
+        The result is kept to resolve the default player id.
+        """
+        players: list[dict[str, Any]] = await self._access.get("player")
+        self._players = players
+        self._players_expire_at = time.monotonic() + self._players_cache_ttl
+        return players
+
+    def invalidate_players(self) -> None:
+        """
+        Forget the known players, so that the next command resolving
+        the default player id lists them again
         """
-        return await self._access.get("player")  # type: ignore
+        self._players = None
 
     async def _get_default_player_id(self) -> int:
         """
         Get default player id
         """
 
-        players = await self.get_players()
+        players = self._players
+        if players is None or time.monotonic() >= self._players_expire_at:
+            players = await self.get_players()
         return int(players[0]["id"])
 
     async def get_player_status(self, player_id: int | None = None) -> dict[str, Any]:
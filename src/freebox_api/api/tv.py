@@ -5,8 +5,10 @@ https://dev.freebox.fr/sdk/os/pvr/
 """
 
 import time
+from typing import Any
 
 from freebox_api.access import Access
+from freebox_api.models import TvProgram
 
 
 class Tv:
@@ -138,14 +140,33 @@ class Tv:
 
         return await self._access.get(f"tv/epg/by_channel/{channel_id}/{date}")
 
-    async def get_tv_programs_by_date(self, date=None):
+    async def get_tv_programs_by_date(
+        self, date: int | None = None, as_model: bool | None = None
+    ) -> dict[str, dict[str, dict[str, Any]]] | dict[str, dict[str, TvProgram]] | None:
         """
         Get tv programs by date
+
+        as_model : `bool`, optional
+            Return `TvProgram` models, default to the access setting
         """
         if date is None:
             date = int(time.time())
 
-        return await self._access.get(f"tv/epg/by_time/{date}")
+        programs: dict[str, dict[str, dict[str, Any]]] | None = await self._access.get(
+            f"tv/epg/by_time/{date}"
+        )
+        if programs is None or not (
+            self._access.use_models if as_model is None else as_model
+        ):
+            return programs
+        # Programs by id, by channel
+        return {
+            channel: {
+                program_id: TvProgram.from_dict(program)
+                for program_id, program in channel_programs.items()
+            }
+            for channel, channel_programs in programs.items()
+        }
 
     async def get_tv_records_configuration(self):
         """
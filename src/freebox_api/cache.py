@@ -0,0 +1,124 @@
+"""
+Response cache for read-only requests.
+"""
+
+import copy
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any
+
+# Time to live in seconds of cached responses, per path pattern.
+# Patterns are matched against the request path without its query string,
+# the first matching pattern wins.
+DEFAULT_CACHE_TTLS: dict[str, float] = {
+    "system/": 30,
+    "lan/config/": 60,
+    "tv/channels/": 3600,
+    "tv/bouquets/": 3600,
+    "tv/bouquets/*/channels/": 3600,
+    "storage/disk/": 30,
+    "wifi/ap/": 60,
+}
+
+DEFAULT_CACHE_MAX_SIZE = 256
+
+
+def get_resource(end_url: str) -> str:
+    """
+    Returns the resource of the given url, its first path segment
+    """
+    return end_url.lstrip("/").split("/", 1)[0].split("?", 1)[0]
+
+
+class ResponseCache:
+    """
+    LRU cache of GET results with per-path time to live
+
+    Any write (PUT, POST, DELETE) on a resource invalidates every cached
+    entry sharing its first path segment, e.g. a PUT on `lan/browser/pub/x`
+    drops the cached `lan/config/`.
+    """
+
+    def __init__(
+        self,
+        ttls: dict[str, float] = DEFAULT_CACHE_TTLS,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+    ) -> None:
+        self.ttls = dict(ttls)
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # Incremented on each invalidation, so that a response fetched before
+        # a write is not stored after it
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_ttl(self, end_url: str) -> float | None:
+        """
+        Returns the time to live for the given url, or None if not cacheable
+        """
+        path = end_url.split("?", 1)[0]
+        for pattern, ttl in self.ttls.items():
+            if fnmatchcase(path, pattern):
+                return ttl
+        return None
+
+    def lookup(self, end_url: str) -> tuple[bool, Any]:
+        """
+        Returns (True, result) on a cache hit, (False, None) otherwise
+        """
+        entry = self._entries.get(end_url)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(end_url)
+                self.hits += 1
+                return (True, copy.deepcopy(result))
+            del self._entries[end_url]
+
+        if self.get_ttl(end_url):
+            self.misses += 1
+        return (False, None)
+
+    def store(self, end_url: str, result: Any, generation: int) -> None:
+        """
+        Store the result fetched at the given cache generation
+        """
+        ttl = self.get_ttl(end_url)
+        if not ttl or generation != self.generation:
+            return
+
+        self._entries[end_url] = (time.monotonic() + ttl, copy.deepcopy(result))
+        self._entries.move_to_end(end_url)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, end_url: str) -> None:
+        """
+        Drop cached entries of the resource written at the given url
+        """
+        self.generation += 1
+        resource = get_resource(end_url)
+        for key in [k for k in self._entries if get_resource(k) == resource]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """
+        Drop all cached entries
+        """
+        self.generation += 1
+        self._entries.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns cache statistics
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -16,3 +16,11 @@ class HttpRequestError(Exception):
 
 class InsufficientPermissionsError(HttpRequestError):
     pass
+
+
+class DownloadVerificationError(Exception):
+    pass
+
+
+class FsTaskError(HttpRequestError):
+    pass
@@ -0,0 +1,282 @@
+"""
+Management of many Freeboxes from a single process.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from typing import Any
+
+from aiohttp import BaseConnector
+
+from freebox_api.aiofreepybox import DEFAULT_CONNECTION_LIMIT
+from freebox_api.aiofreepybox import DEFAULT_CONNECTION_LIMIT_PER_HOST
+from freebox_api.aiofreepybox import DEFAULT_KEEPALIVE_TIMEOUT
+from freebox_api.aiofreepybox import Freepybox
+from freebox_api.aiofreepybox import StrOrPath
+from freebox_api.aiofreepybox import create_connector
+from freebox_api.exceptions import NotOpenError
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_LOGIN_CONCURRENCY = 8
+# Freepybox options replacing the connection pool shared by the boxes
+_SHARED_POOL_OPTIONS = ("connector", "session")
+
+
+class FreeboxFleet:
+    """
+    Sessions to many Freeboxes, sharing a single connection pool
+
+    Boxes are registered with `add_box`, then opened together by `open`,
+    which limits the number of concurrent logins. A box failing to open does
+    not prevent the others from being used, and `open` can be called again to
+    retry it.
+
+    Fan-out calls run a coroutine function on every box and yield the
+    results as they arrive:
+
+        async for name, status in fleet.call(lambda fbx: fbx.connection.get_status()):
+            if isinstance(status, Exception):
+                ...
+    """
+
+    def __init__(
+        self,
+        *,
+        login_concurrency: int = _DEFAULT_LOGIN_CONCURRENCY,
+        connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+        connection_limit_per_host: int = DEFAULT_CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        connector: BaseConnector | None = None,
+        **freepybox_options: Any,
+    ) -> None:
+        """
+        login_concurrency : `int`, optional
+            Maximum number of boxes opened at once, default to 8
+        connection_limit, connection_limit_per_host, keepalive_timeout
+            Options of the shared connection pool, ignored if a `connector`
+            is given
+        connector : `BaseConnector`, optional
+            Connection pool to use, left open by `close`
+        freepybox_options
+            Default `Freepybox` options of the boxes, e.g. `app_desc`,
+            `api_version`, `timeout` or `session_renewal_interval`
+            Per box objects such as a `cache` or a `throttle` must be given
+            to `add_box` instead
+        """
+        _check_box_options(freepybox_options)
+        self.login_concurrency = login_concurrency
+        self._connector_options: dict[str, Any] = {
+            "limit": connection_limit,
+            "limit_per_host": connection_limit_per_host,
+            "keepalive_timeout": keepalive_timeout,
+        }
+        self._connector: BaseConnector | None = connector
+        self._connector_owner = connector is None
+        self._freepybox_options = freepybox_options
+        # Registered boxes by name: (host, port, freepybox options)
+        self._boxes: dict[str, tuple[str, str, dict[str, Any]]] = {}
+        self._opened: dict[str, Freepybox] = {}
+        # Last error raised while opening each box not opened
+        self.open_errors: dict[str, Exception] = {}
+
+    def add_box(
+        self, name: str, host: str, port: str, token_file: StrOrPath, **options: Any
+    ) -> None:
+        """
+        Register a box, opened by the next `open`
+
+        name : `str`
+            Name identifying the box in the fleet
+        host : `str`
+        port : `str`
+        token_file : `str`
+            Token file of the box, each box has its own application token
+        options
+            `Freepybox` options of the box, overriding the fleet defaults,
+            but for `connector` and `session`
+        """
+        if name in self._boxes:
+            raise ValueError(f"Box {name} already registered")
+        _check_box_options(options)
+
+        self._boxes[name] = (
+            host,
+            port,
+            {**self._freepybox_options, **options, "token_file": token_file},
+        )
+
+    async def remove_box(self, name: str) -> None:
+        """
+        Close and unregister a box
+        """
+        del self._boxes[name]
+        self.open_errors.pop(name, None)
+        fbx = self._opened.pop(name, None)
+        if fbx is not None:
+            await fbx.close()
+
+    def get_box(self, name: str) -> Freepybox:
+        """
+        Returns the given box, raising `NotOpenError` if not open
+        """
+        fbx = self._opened.get(name)
+        if fbx is None:
+            raise NotOpenError(f"Box {name} is not open")
+        return fbx
+
+    @property
+    def names(self) -> list[str]:
+        """
+        Names of the registered boxes
+        """
+        return list(self._boxes)
+
+    @property
+    def opened(self) -> list[str]:
+        """
+        Names of the open boxes
+        """
+        return [name for name in self._boxes if name in self._opened]
+
+    async def open(self, names: Iterable[str] | None = None) -> dict[str, Exception]:
+        """
+        Open the given boxes, default to every registered box not open yet
+
+        Returns the errors of the boxes which could not be opened, by name.
+        """
+        if self._connector is None:
+            self._connector = await create_connector(**self._connector_options)
+
+        if names is None:
+            names = [name for name in self._boxes if name not in self._opened]
+        names = list(names)
+        semaphore = asyncio.Semaphore(self.login_concurrency)
+        results = await asyncio.gather(
+            *(self._open_box(semaphore, name) for name in names)
+        )
+        return {
+            name: err
+            for name, err in zip(names, results, strict=True)
+            if err is not None
+        }
+
+    async def _open_box(
+        self, semaphore: asyncio.Semaphore, name: str
+    ) -> Exception | None:
+        if name in self._opened:
+            return None
+
+        host, port, options = self._boxes[name]
+        async with semaphore:
+            try:
+                fbx = Freepybox(**options, connector=self._connector)
+                # Log in while holding the semaphore, rather than on the first
+                # call to the box
+                await fbx.open(host, port, login=True)
+            except Exception as err:
+                logger.warning("Unable to open box %s: %s", name, err)
+                self.open_errors[name] = err
+                return err
+
+        self._opened[name] = fbx
+        self.open_errors.pop(name, None)
+        return None
+
+    async def close(self) -> None:
+        """
+        Close the sessions to every box, and the shared connection pool
+        """
+        opened = list(self._opened)
+        results = await asyncio.gather(
+            *(self._opened[name].close() for name in opened),
+            return_exceptions=True,
+        )
+        for name, result in zip(opened, results, strict=True):
+            if isinstance(result, Exception):
+                logger.warning("Unable to close box %s: %s", name, result)
+        self._opened.clear()
+
+        if self._connector_owner and self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+
+    async def call(
+        self,
+        func: Callable[[Freepybox], Awaitable[Any]],
+        names: Iterable[str] | None = None,
+        *,
+        concurrency: int | None = None,
+        timeout: float | None = None,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Run `func` on the given boxes, default to every registered box, and
+        yield (name, result) as results arrive
+
+        The result is the exception raised for a box failing, or
+        `NotOpenError` for a box not open, without affecting the others.
+
+        func : `Callable`
+            Coroutine function taking a `Freepybox`
+        names : `Iterable[str]`, optional
+            Boxes to call, default to all
+        concurrency : `int`, optional
+            Maximum number of boxes called at once, default to no limit
+        timeout : `float`, optional
+            Maximum number of seconds to wait for each box, default to no limit
+        """
+        semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+        async def run(name: str) -> tuple[str, Any]:
+            try:
+                fbx = self.get_box(name)
+                if semaphore is None:
+                    return (name, await asyncio.wait_for(func(fbx), timeout))
+                async with semaphore:
+                    return (name, await asyncio.wait_for(func(fbx), timeout))
+            except Exception as err:
+                return (name, err)
+
+        tasks = [
+            asyncio.ensure_future(run(name))
+            for name in (self._boxes if names is None else names)
+        ]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # The caller stopped iterating early
+            for task in tasks:
+                task.cancel()
+
+    async def call_all(
+        self,
+        func: Callable[[Freepybox], Awaitable[Any]],
+        names: Iterable[str] | None = None,
+        *,
+        concurrency: int | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """
+        Run `func` on the given boxes and returns the results by name,
+        see `call`
+        """
+        return {
+            name: result
+            async for name, result in self.call(
+                func, names, concurrency=concurrency, timeout=timeout
+            )
+        }
+
+
+def _check_box_options(options: dict[str, Any]) -> None:
+    """
+    Reject the `Freepybox` options replacing the shared connection pool
+    """
+    for option in _SHARED_POOL_OPTIONS:
+        if option in options:
+            raise ValueError(f"Boxes of a fleet share its pool, {option} not allowed")
@@ -0,0 +1,303 @@
+"""
+Local metadata index of the Freebox file system.
+"""
+
+import asyncio
+import logging
+import posixpath
+import sqlite3
+from typing import Any
+
+from freebox_api.aiofreepybox import StrOrPath
+from freebox_api.api.fs import _REQUEST_ERRORS
+from freebox_api.api.fs import Fs
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_REFRESH_CONCURRENCY = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    modification INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent);
+CREATE INDEX IF NOT EXISTS entries_name ON entries (name);
+CREATE INDEX IF NOT EXISTS entries_size ON entries (size);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    modification INTEGER NOT NULL
+);
+"""
+
+
+def _subtree_bounds(path: str) -> tuple[str, str]:
+    """
+    Returns the (low, high) bounds of the paths below the given directory,
+    as '0' is the character following '/'
+    """
+    prefix = path.rstrip("/")
+    return (prefix + "/", prefix + "0")
+
+
+class FsIndex:
+    """
+    Index of paths, sizes, modification times and types of the Freebox files,
+    stored in a SQLite database
+
+    The index is refreshed incrementally: a directory is listed again only
+    when its modification time changed. As a directory modification time only
+    changes when entries are added, removed or renamed in it, use a full
+    refresh to pick up files modified in place.
+    """
+
+    def __init__(self, fs: Fs, database: StrOrPath) -> None:
+        self._fs = fs
+        self._database = database
+        self._db: sqlite3.Connection | None = None
+        # Serializes database accesses, which run in executor threads
+        self._db_lock = asyncio.Lock()
+
+    async def open(self) -> None:
+        """
+        Open the index database, creating it if needed
+        """
+        if self._db is None:
+            self._db = await asyncio.to_thread(self._connect)
+
+    async def close(self) -> None:
+        """
+        Close the index database
+        """
+        if self._db is not None:
+            await asyncio.to_thread(self._db.close)
+            self._db = None
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self._database, check_same_thread=False)
+        db.executescript(_SCHEMA)
+        return db
+
+    async def _execute(self, func, *args):
+        """
+        Run a database function in an executor thread
+        """
+        await self.open()
+        async with self._db_lock:
+            return await asyncio.to_thread(func, self._db, *args)
+
+    async def refresh(
+        self,
+        path: str = "/",
+        full: bool = False,
+        concurrency: int = _DEFAULT_REFRESH_CONCURRENCY,
+    ) -> dict[str, int]:
+        """
+        Refresh the index of the given directory tree
+
+        Returns the number of directories listed, left unchanged, and failed
+        to be listed. The index of a directory which failed to be listed is
+        kept as is, and refreshed on the next refresh.
+
+        path : `str`, optional
+            Default to /
+        full : `bool`, optional
+            List every directory again, default to False
+        concurrency : `int`, optional
+            Maximum number of concurrent requests, default to 4
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        stats = {"listed": 0, "unchanged": 0, "failed": 0}
+        # (directory, modification time seen in its parent listing if any)
+        level: list[tuple[str, int | None]] = [(path, None)]
+
+        while level:
+            known = await self._execute(_get_directory_times, [d for d, _ in level])
+            results = await asyncio.gather(
+                *(
+                    self._check_directory(
+                        semaphore,
+                        directory,
+                        seen,
+                        None if full else known.get(directory),
+                    )
+                    for directory, seen in level
+                )
+            )
+            level = []
+            for directory, listing in results:
+                if listing is None:
+                    stats["unchanged"] += 1
+                    level.extend(
+                        (child, None)
+                        for child in await self._execute(_get_subdirectories, directory)
+                    )
+                    continue
+                if isinstance(listing, Exception):
+                    # Keep the indexed subtree, not to drop it on a transient
+                    # error
+                    stats["failed"] += 1
+                    continue
+
+                modification, entries = listing
+                stats["listed"] += 1
+                await self._execute(
+                    _replace_directory, directory, modification, entries
+                )
+                level.extend(
+                    (
+                        posixpath.join(directory, entry["name"]),
+                        entry.get("modification"),
+                    )
+                    for entry in entries
+                    if entry["type"] == "dir"
+                )
+
+        return stats
+
+    async def _check_directory(self, semaphore, directory, seen, known):
+        """
+        List a directory if it changed since it was indexed
+        Returns (directory, None) if unchanged,
+        (directory, (modification, entries)) if listed, or
+        (directory, error) if it failed to be listed
+        """
+        async with semaphore:
+            try:
+                modification = seen
+                if modification is None:
+                    info = await self._fs.get_info(directory)
+                    modification = info["modification"]
+                if modification == known:
+                    return (directory, None)
+
+                entries = await self._fs.list_files(directory)
+            except _REQUEST_ERRORS as err:
+                logger.warning("Unable to list %s: %s", directory, err)
+                return (directory, err)
+
+        entries = [e for e in entries or [] if e["name"] not in (".", "..")]
+        return (directory, (modification, entries))
+
+    async def search(self, pattern: str) -> list[dict[str, Any]]:
+        """
+        Returns the indexed entries whose name matches the glob pattern
+        """
+        return await self._execute(_search, pattern)  # type: ignore
+
+    async def get_size(self, path: str = "/") -> int:
+        """
+        Returns the total size of the indexed files below the given directory
+        """
+        return await self._execute(_get_size, path)  # type: ignore
+
+    async def find_duplicates(self, min_size: int = 1) -> list[list[str]]:
+        """
+        Returns groups of paths of indexed files sharing the same name and size
+
+        Contents can be compared with `Fs.get_file_hash` to confirm.
+        """
+        return await self._execute(_find_duplicates, min_size)  # type: ignore
+
+
+def _get_directory_times(db: sqlite3.Connection, paths: list[str]) -> dict[str, int]:
+    times = {}
+    for path in paths:
+        row = db.execute(
+            "SELECT modification FROM directories WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None:
+            times[path] = row[0]
+    return times
+
+
+def _get_subdirectories(db: sqlite3.Connection, path: str) -> list[str]:
+    rows = db.execute(
+        "SELECT path FROM entries WHERE parent = ? AND type = 'dir'", (path,)
+    )
+    return [row[0] for row in rows]
+
+
+def _replace_directory(
+    db: sqlite3.Connection,
+    path: str,
+    modification: int,
+    entries: list[dict[str, Any]],
+) -> None:
+    names = {entry["name"] for entry in entries}
+    with db:
+        # Drop the subtrees of the removed directories
+        for (child,) in db.execute(
+            "SELECT path FROM entries WHERE parent = ? AND type = 'dir'", (path,)
+        ).fetchall():
+            if posixpath.basename(child) not in names:
+                low, high = _subtree_bounds(child)
+                db.execute(
+                    "DELETE FROM entries WHERE path >= ? AND path < ?", (low, high)
+                )
+                db.execute(
+                    "DELETE FROM directories WHERE path = ? "
+                    "OR (path >= ? AND path < ?)",
+                    (child, low, high),
+                )
+
+        db.execute("DELETE FROM entries WHERE parent = ?", (path,))
+        db.executemany(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    posixpath.join(path, entry["name"]),
+                    path,
+                    entry["name"],
+                    entry["type"],
+                    entry.get("size", 0),
+                    entry.get("modification", 0),
+                )
+                for entry in entries
+            ],
+        )
+        if entries or modification:
+            db.execute(
+                "INSERT OR REPLACE INTO directories VALUES (?, ?)", (path, modification)
+            )
+        else:
+            db.execute("DELETE FROM directories WHERE path = ?", (path,))
+
+
+def _search(db: sqlite3.Connection, pattern: str) -> list[dict[str, Any]]:
+    rows = db.execute(
+        "SELECT path, type, size, modification FROM entries WHERE name GLOB ?",
+        (pattern,),
+    )
+    return [
+        {"path": path, "type": type, "size": size, "modification": modification}
+        for path, type, size, modification in rows
+    ]
+
+
+def _get_size(db: sqlite3.Connection, path: str) -> int:
+    low, high = _subtree_bounds(path)
+    row = db.execute(
+        "SELECT SUM(size) FROM entries WHERE type = 'file' AND path >= ? AND path < ?",
+        (low, high),
+    ).fetchone()
+    return int(row[0] or 0)
+
+
+def _find_duplicates(db: sqlite3.Connection, min_size: int) -> list[list[str]]:
+    groups: dict[tuple[str, int], list[str]] = {}
+    rows = db.execute(
+        "SELECT e.name, e.size, e.path FROM entries e "
+        "JOIN (SELECT name, size FROM entries WHERE type = 'file' AND size >= ? "
+        "GROUP BY name, size HAVING COUNT(*) > 1) d "
+        "ON e.name = d.name AND e.size = d.size WHERE e.type = 'file' "
+        "ORDER BY e.path",
+        (min_size,),
+    )
+    for name, size, path in rows:
+        groups.setdefault((name, size), []).append(path)
+    return list(groups.values())
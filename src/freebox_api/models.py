@@ -0,0 +1,451 @@
+"""
+Compact typed models of high volume API responses.
+
+Models store the documented fields of a response in slots rather than in a
+dict, and the strings of enumerated fields such as types, sources or vendor
+names are interned so that records share them. Nested objects are packed as
+tuples of their values, and decoded into models on first access only.
+Undocumented fields are kept apart, and read as mapping items.
+
+Models can be read as attributes, `host.primary_name`, or as mappings,
+`host["primary_name"]`, and compare by value.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any
+from typing import ClassVar
+from typing import Generic
+from typing import TypeVar
+from typing import overload
+
+ModelT = TypeVar("ModelT", bound="Model")
+
+
+class _NestedField(Generic[ModelT]):
+    """
+    Nested object field, stored packed in the slot named after the field
+    with a leading underscore
+    """
+
+    def __init__(self, model: type[ModelT]) -> None:
+        self.model = model
+        self.slot = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.slot = f"_{name}"
+
+    def __set__(self, obj: "Model", value: Any) -> None:
+        setattr(obj, self.slot, value)
+
+    def pack(self, value: Any) -> Any:
+        """
+        Returns the packed value of a response object
+        """
+        raise NotImplementedError
+
+    def to_raw(self, value: Any) -> Any:
+        """
+        Returns the response object of a packed or decoded value
+        """
+        raise NotImplementedError
+
+
+class Nested(_NestedField[ModelT]):
+    """
+    Nested object, decoded on first access
+    """
+
+    @overload
+    def __get__(self, obj: None, owner: type) -> "Nested[ModelT]": ...
+
+    @overload
+    def __get__(self, obj: "Model", owner: type) -> ModelT | None: ...
+
+    def __get__(self, obj: "Model | None", owner: type) -> Any:
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if value is not None and not isinstance(value, Model):
+            value = self.model.unpack(value)
+            setattr(obj, self.slot, value)
+        return value
+
+    def pack(self, value: Any) -> Any:
+        return self.model.pack(value)
+
+    def to_raw(self, value: Any) -> Any:
+        return self.model.to_raw(value)
+
+
+class NestedList(_NestedField[ModelT]):
+    """
+    List of nested objects, decoded on first access
+    """
+
+    @overload
+    def __get__(self, obj: None, owner: type) -> "NestedList[ModelT]": ...
+
+    @overload
+    def __get__(self, obj: "Model", owner: type) -> tuple[ModelT, ...] | None: ...
+
+    def __get__(self, obj: "Model | None", owner: type) -> Any:
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if value and not isinstance(value[0], Model):
+            value = tuple(self.model.unpack(item) for item in value)
+            setattr(obj, self.slot, value)
+        return value
+
+    def pack(self, value: Any) -> Any:
+        if not isinstance(value, list):
+            return value
+        return tuple(self.model.pack(item) for item in value)
+
+    def to_raw(self, value: Any) -> Any:
+        return [self.model.to_raw(item) for item in value]
+
+
+class Model:
+    """
+    Response model, created with `from_dict`
+    """
+
+    __slots__ = ("_extra",)
+    _extra: dict[str, Any] | None
+    # Slot of each documented field, by field name
+    _slots: ClassVar[dict[str, str]] = {}
+    # Nested object fields, by field name
+    _nested: ClassVar[dict[str, _NestedField[Any]]] = {}
+    # Fields with few distinct string values, interned
+    _interned: ClassVar[frozenset[str]] = frozenset()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        slots: dict[str, str] = {}
+        nested: dict[str, _NestedField[Any]] = {}
+        for klass in reversed(cls.__mro__):
+            for slot in klass.__dict__.get("__slots__", ()):
+                if not slot.startswith("_"):
+                    slots[slot] = slot
+                elif isinstance(field := getattr(cls, slot[1:], None), _NestedField):
+                    slots[slot[1:]] = slot
+                    nested[slot[1:]] = field
+        cls._slots = slots
+        cls._nested = nested
+
+    @classmethod
+    def from_dict(cls: type[ModelT], data: Mapping[str, Any]) -> ModelT:
+        """
+        Returns a model of the given response object
+        """
+        obj = cls.__new__(cls)
+        nested = cls._nested
+        interned = cls._interned
+        for field, slot in cls._slots.items():
+            value = data.get(field)
+            if value is None:
+                pass
+            elif field in interned:
+                if type(value) is str:
+                    value = sys.intern(value)
+            elif field in nested:
+                value = nested[field].pack(value)
+            setattr(obj, slot, value)
+        extra = None
+        if len(data) > len(cls._slots) or any(key not in cls._slots for key in data):
+            extra = {k: v for k, v in data.items() if k not in cls._slots}
+        obj._extra = extra
+        return obj
+
+    @classmethod
+    def pack(cls, data: Any) -> Any:
+        """
+        Returns the values of a nested response object as a tuple, or the
+        object itself if it has undocumented or nested fields
+        """
+        if (
+            not isinstance(data, dict)
+            or cls._nested
+            or any(key not in cls._slots for key in data)
+        ):
+            return data
+        interned = cls._interned
+        values = []
+        for field in cls._slots:
+            value = data.get(field)
+            if field in interned and type(value) is str:
+                value = sys.intern(value)
+            values.append(value)
+        return tuple(values)
+
+    @classmethod
+    def unpack(cls: type[ModelT], value: Any) -> ModelT:
+        """
+        Returns a model of a packed nested object
+        """
+        if not isinstance(value, tuple):
+            return cls.from_dict(value)
+        obj = cls.__new__(cls)
+        for slot, item in zip(cls._slots.values(), value, strict=True):
+            setattr(obj, slot, item)
+        obj._extra = None
+        return obj
+
+    @classmethod
+    def to_raw(cls, value: Any) -> Any:
+        """
+        Returns the response object of a packed or decoded nested object
+        """
+        if isinstance(value, Model):
+            return value.to_dict()
+        if isinstance(value, tuple):
+            return {
+                field: item
+                for field, item in zip(cls._slots, value, strict=True)
+                if item is not None
+            }
+        return value
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the response object of the model
+        """
+        data = {}
+        for field, slot in self._slots.items():
+            value = getattr(self, slot)
+            if value is not None and field in self._nested:
+                value = self._nested[field].to_raw(value)
+            if value is not None:
+                data[field] = value
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __getitem__(self, field: str) -> Any:
+        if field in self._slots:
+            return getattr(self, field)
+        if self._extra is not None and field in self._extra:
+            return self._extra[field]
+        raise KeyError(field)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """
+        Returns the value of a field, or `default` if not set
+        """
+        try:
+            value = self[field]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        if self._extra == other._extra and all(
+            getattr(self, slot) == getattr(other, slot) for slot in self._slots.values()
+        ):
+            return True
+        # Nested objects may be packed in one model and decoded in the other
+        return bool(self._nested) and self.to_dict() == other.to_dict()
+
+    # Models are mutable
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def decode(
+    results: list[dict[str, Any]] | None, model: type[ModelT], as_model: bool
+) -> list[dict[str, Any]] | list[ModelT] | None:
+    """
+    Returns the given list of results as models if `as_model`
+    """
+    if not as_model or results is None:
+        return results
+    return [model.from_dict(item) for item in results]
+
+
+class L2Ident(Model):
+    __slots__ = ("id", "type")
+    _interned = frozenset({"type"})
+
+    id: str
+    type: str
+
+
+class L3Connectivity(Model):
+    __slots__ = (
+        "addr",
+        "af",
+        "active",
+        "reachable",
+        "last_activity",
+        "last_time_reachable",
+    )
+    _interned = frozenset({"af"})
+
+    addr: str
+    af: str
+    active: bool
+    reachable: bool
+    last_activity: int
+    last_time_reachable: int
+
+
+class HostName(Model):
+    __slots__ = ("name", "source")
+    _interned = frozenset({"source"})
+
+    name: str
+    source: str
+
+
+class LanHost(Model):
+    __slots__ = (
+        "id",
+        "primary_name",
+        "default_name",
+        "host_type",
+        "primary_name_manual",
+        "_l2ident",
+        "vendor_name",
+        "model",
+        "persistent",
+        "reachable",
+        "last_time_reachable",
+        "active",
+        "last_activity",
+        "first_activity",
+        "_names",
+        "_l3connectivities",
+        "network_control",
+        "access_point",
+        "interface",  # added by Lan.get_all_hosts
+    )
+    _interned = frozenset({"host_type", "vendor_name", "model", "interface"})
+
+    id: str
+    primary_name: str
+    default_name: str
+    host_type: str
+    primary_name_manual: bool
+    l2ident = Nested(L2Ident)
+    vendor_name: str
+    model: str
+    persistent: bool
+    reachable: bool
+    last_time_reachable: int
+    active: bool
+    last_activity: int
+    first_activity: int
+    names = NestedList(HostName)
+    l3connectivities = NestedList(L3Connectivity)
+    network_control: dict[str, Any]
+    access_point: dict[str, Any]
+    interface: str
+
+
+class DownloadTask(Model):
+    __slots__ = (
+        "id",
+        "type",
+        "name",
+        "status",
+        "io_priority",
+        "size",
+        "queue_pos",
+        "eta",
+        "error",
+        "created_ts",
+        "tx_bytes",
+        "rx_bytes",
+        "tx_rate",
+        "rx_rate",
+        "tx_pct",
+        "rx_pct",
+        "stop_ratio",
+        "archive_password",
+        "info_hash",
+        "piece_length",
+        "download_dir",
+    )
+    _interned = frozenset({"type", "status", "io_priority", "error", "download_dir"})
+
+    id: int
+    type: str
+    name: str
+    status: str
+    io_priority: str
+    size: int
+    queue_pos: int
+    eta: int
+    error: str
+    created_ts: int
+    tx_bytes: int
+    rx_bytes: int
+    tx_rate: int
+    rx_rate: int
+    tx_pct: int
+    rx_pct: int
+    stop_ratio: int
+    archive_password: str
+    info_hash: str
+    piece_length: int
+    download_dir: str
+
+
+class CallLogEntry(Model):
+    __slots__ = (
+        "id",
+        "type",
+        "datetime",
+        "number",
+        "name",
+        "duration",
+        "new",
+        "contact_id",
+        "line_id",
+    )
+    _interned = frozenset({"type", "number", "name"})
+
+    id: int
+    type: str
+    datetime: int
+    number: str
+    name: str
+    duration: int
+    new: bool
+    contact_id: int
+    line_id: int
+
+
+class TvProgram(Model):
+    __slots__ = (
+        "id",
+        "date",
+        "duration",
+        "title",
+        "sub_title",
+        "category",
+        "category_name",
+        "picture",
+        "picture_big",
+        "season_number",
+        "episode_number",
+    )
+    _interned = frozenset({"category_name", "title"})
+
+    id: str
+    date: int
+    duration: int
+    title: str
+    sub_title: str
+    category: int
+    category_name: str
+    picture: str
+    picture_big: str
+    season_number: int
+    episode_number: int
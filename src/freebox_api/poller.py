@@ -0,0 +1,199 @@
+"""
+Polling of freebox resources with change detection.
+"""
+
+import asyncio
+import logging
+import random
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from collections.abc import Mapping
+from typing import Any
+from typing import TypedDict
+
+from aiohttp import ClientError
+
+from freebox_api.exceptions import HttpRequestError
+from freebox_api.throttle import PRIORITY_BACKGROUND
+from freebox_api.throttle import request_priority
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MIN_POLL_INTERVAL = 5
+_DEFAULT_MAX_POLL_INTERVAL = 60
+_DEFAULT_POLL_BACKOFF = 1.5
+_DEFAULT_POLL_JITTER = 0.1
+
+# Key of the state of results which are neither dicts nor lists
+_RESULT_KEY = "result"
+
+
+class PollDiff(TypedDict):
+    """
+    Changes between two polled results
+    """
+
+    added: dict[Any, Any]
+    removed: dict[Any, Any]
+    changed: dict[Any, tuple[Any, Any]]  # key -> (old value, new value)
+
+
+def diff_states(old: Mapping[Any, Any], new: Mapping[Any, Any]) -> PollDiff:
+    """
+    Returns the keys added, removed and changed from `old` to `new`
+    """
+    return {
+        "added": {k: v for k, v in new.items() if k not in old},
+        "removed": {k: v for k, v in old.items() if k not in new},
+        "changed": {k: (old[k], v) for k, v in new.items() if k in old and old[k] != v},
+    }
+
+
+class Poller:
+    """
+    Poll a getter and notify the changes of its result to subscribers
+
+    The getter is polled while at least one subscriber is running, every
+    `min_interval` seconds while its result changes. The interval grows up
+    to `max_interval` while its result is unchanged, and intervals are
+    randomized by `jitter` so that pollers started together spread out.
+    Failed polls are logged and kept in `last_error`, and polling goes on
+    every `max_interval` seconds.
+
+    Results are compared as mappings: dicts by key, lists by the `key` of
+    their items, or by index if no `key` is given.
+
+        poller = Poller(fbx.wifi.get_station_list, key="mac")
+        async for diff in poller.subscribe():
+            ...
+
+    A poller can be shared: each subscriber receives the changes since the
+    last diff it consumed, so that slow subscribers get merged diffs rather
+    than holding back the others. Results must not be modified.
+    """
+
+    def __init__(
+        self,
+        getter: Callable[[], Awaitable[Any]],
+        *,
+        key: str | Callable[[Any], Hashable] | None = None,
+        min_interval: float = _DEFAULT_MIN_POLL_INTERVAL,
+        max_interval: float = _DEFAULT_MAX_POLL_INTERVAL,
+        backoff: float = _DEFAULT_POLL_BACKOFF,
+        jitter: float = _DEFAULT_POLL_JITTER,
+        priority: int = PRIORITY_BACKGROUND,
+    ) -> None:
+        """
+        getter : `Callable`
+            Coroutine function returning the polled result
+        key : `str` or `Callable`, optional
+            Item key or function returning the key of an item, for list results
+        min_interval : `float`, optional
+            Seconds between polls while the result changes, default to 5
+        max_interval : `float`, optional
+            Maximum seconds between polls while the result is unchanged,
+            or after an error, default to 60
+        backoff : `float`, optional
+            Factor applied to the interval when the result is unchanged,
+            default to 1.5
+        jitter : `float`, optional
+            Relative randomization of intervals, default to 0.1
+        priority : `int`, optional
+            Priority of the poll requests, default to background
+        """
+        self._getter = getter
+        self._key = key
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.priority = priority
+        self.interval = min_interval
+        self._state: dict[Any, Any] | None = None
+        # Event of each running subscriber, set when the state changed
+        self._subscribers: set[asyncio.Event] = set()
+        self._task: asyncio.Task[None] | None = None
+        self.poll_count = 0
+        self.last_error: Exception | None = None
+
+    def get_state(self) -> dict[Any, Any] | None:
+        """
+        Returns the last polled result as a mapping, or None if not polled yet
+        """
+        return self._state
+
+    async def subscribe(self) -> AsyncIterator[PollDiff]:
+        """
+        Yield the changes of the polled result, starting with the current
+        result as added keys
+        """
+        updated = asyncio.Event()
+        self._subscribers.add(updated)
+        if self._state is not None:
+            updated.set()
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+        seen: dict[Any, Any] = {}
+        try:
+            while True:
+                await updated.wait()
+                updated.clear()
+                state = self._state or {}
+                diff = diff_states(seen, state)
+                seen = state
+                if diff["added"] or diff["removed"] or diff["changed"]:
+                    yield diff
+        finally:
+            self._subscribers.discard(updated)
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                with request_priority(self.priority):
+                    result = await self._getter()
+                state = self._to_state(result)
+            except (HttpRequestError, ClientError, asyncio.TimeoutError) as err:
+                logger.warning("Polling %s failed: %s", self._getter, err)
+                self.last_error = err
+                self.interval = self.max_interval
+            except Exception as err:
+                # Keep polling, so that subscribers are not left waiting
+                logger.exception("Polling %s failed", self._getter)
+                self.last_error = err
+                self.interval = self.max_interval
+            else:
+                self.poll_count += 1
+                self.last_error = None
+                if state != self._state:
+                    self._state = state
+                    self.interval = self.min_interval
+                    for updated in self._subscribers:
+                        updated.set()
+                else:
+                    self.interval = min(self.interval * self.backoff, self.max_interval)
+
+            jitter = random.uniform(-self.jitter, self.jitter)
+            await asyncio.sleep(self.interval * (1 + jitter))
+
+    def _to_state(self, result: Any) -> dict[Any, Any]:
+        """
+        Returns the given result as a mapping
+        """
+        if result is None:
+            # Empty lists are returned as no result
+            return {}
+        if isinstance(result, dict):
+            return result
+        if not isinstance(result, list):
+            return {_RESULT_KEY: result}
+        if self._key is None:
+            return dict(enumerate(result))
+        if isinstance(self._key, str):
+            return {item[self._key]: item for item in result}
+        return {self._key(item): item for item in result}
@@ -0,0 +1,214 @@
+"""
+Presence tracking of the LAN hosts.
+"""
+
+from collections.abc import Iterable
+from collections.abc import Mapping
+from typing import Any
+from typing import TypedDict
+
+from freebox_api.api.lan import Lan
+from freebox_api.api.lan import merge_hosts
+
+PRESENCE_JOIN = "join"
+PRESENCE_LEAVE = "leave"
+PRESENCE_IP_CHANGE = "ip_change"
+
+
+class PresenceEvent(TypedDict):
+    """
+    Presence change of a LAN host
+    """
+
+    type: str  # join, leave or ip_change
+    mac: str
+    interface: str
+    host: dict[str, Any]
+    old_ips: frozenset[str]
+    new_ips: frozenset[str]
+
+
+def get_host_ips(host: Mapping[str, Any]) -> frozenset[str]:
+    """
+    Returns the active IP addresses of a LAN host
+    """
+    return frozenset(
+        l3["addr"]
+        for l3 in host.get("l3connectivities") or []
+        if l3.get("active") and l3.get("addr")
+    )
+
+
+def get_host_names(host: Mapping[str, Any]) -> frozenset[str]:
+    """
+    Returns the lower case names of a LAN host
+    """
+    names = {name["name"] for name in host.get("names") or [] if name.get("name")}
+    if host.get("primary_name"):
+        names.add(host["primary_name"])
+    return frozenset(name.lower() for name in names)
+
+
+class LanPresence:
+    """
+    Table of the LAN hosts of every interface, indexed by MAC address,
+    IP address and name
+
+    Each update compares the hosts with the table by their presence,
+    addresses and names only, and updates the indexes of the changed hosts.
+    """
+
+    def __init__(self, lan: Lan) -> None:
+        self._lan = lan
+        # Hosts by MAC address
+        self._hosts: dict[str, dict[str, Any]] = {}
+        self._interfaces: dict[str, str] = {}
+        # (active, ips, names) of each host, compared on each update
+        self._fingerprints: dict[str, tuple[bool, frozenset[str], frozenset[str]]] = {}
+        self._by_ip: dict[str, str] = {}
+        self._by_name: dict[str, set[str]] = {}
+
+    async def refresh(self) -> list[PresenceEvent]:
+        """
+        Fetch the hosts of every interface concurrently and update the table
+
+        Returns the presence changes since the previous update.
+        """
+        return self.update(await self._lan.get_hosts_by_interface())
+
+    def update(
+        self, hosts_by_interface: Mapping[str, Iterable[dict[str, Any]]]
+    ) -> list[PresenceEvent]:
+        """
+        Update the table with the hosts of every interface
+
+        Returns the presence changes since the previous update.
+        """
+        seen = merge_hosts(hosts_by_interface)
+        events: list[PresenceEvent] = []
+        for mac, (interface, host) in seen.items():
+            self._set_host(mac, interface, host, events)
+        for mac in [mac for mac in self._hosts if mac not in seen]:
+            self._remove_host(mac, events)
+        return events
+
+    def _set_host(
+        self,
+        mac: str,
+        interface: str,
+        host: dict[str, Any],
+        events: list[PresenceEvent],
+    ) -> None:
+        self._hosts[mac] = host
+        self._interfaces[mac] = interface
+        active = bool(host.get("active"))
+        ips = get_host_ips(host) if active else frozenset()
+        names = get_host_names(host)
+        fingerprint = (active, ips, names)
+        old = self._fingerprints.get(mac)
+        if old == fingerprint:
+            return
+
+        self._fingerprints[mac] = fingerprint
+        old_active, old_ips, old_names = old or (False, frozenset(), frozenset())
+        self._reindex(mac, old_ips, ips, old_names, names)
+
+        if active and not old_active:
+            event_type = PRESENCE_JOIN
+        elif old_active and not active:
+            event_type = PRESENCE_LEAVE
+        elif active and ips != old_ips:
+            event_type = PRESENCE_IP_CHANGE
+        else:
+            return
+        events.append(
+            {
+                "type": event_type,
+                "mac": mac,
+                "interface": interface,
+                "host": host,
+                "old_ips": old_ips,
+                "new_ips": ips,
+            }
+        )
+
+    def _remove_host(self, mac: str, events: list[PresenceEvent]) -> None:
+        host = self._hosts.pop(mac)
+        interface = self._interfaces.pop(mac)
+        active, ips, names = self._fingerprints.pop(mac)
+        self._reindex(mac, ips, frozenset(), names, frozenset())
+        if active:
+            events.append(
+                {
+                    "type": PRESENCE_LEAVE,
+                    "mac": mac,
+                    "interface": interface,
+                    "host": host,
+                    "old_ips": ips,
+                    "new_ips": frozenset(),
+                }
+            )
+
+    def _reindex(
+        self,
+        mac: str,
+        old_ips: frozenset[str],
+        ips: frozenset[str],
+        old_names: frozenset[str],
+        names: frozenset[str],
+    ) -> None:
+        for ip in old_ips - ips:
+            if self._by_ip.get(ip) == mac:
+                del self._by_ip[ip]
+        for ip in ips - old_ips:
+            self._by_ip[ip] = mac
+        for name in old_names - names:
+            macs = self._by_name.get(name)
+            if macs is not None:
+                macs.discard(mac)
+                if not macs:
+                    del self._by_name[name]
+        for name in names - old_names:
+            self._by_name.setdefault(name, set()).add(mac)
+
+    def get_host(self, mac: str) -> dict[str, Any] | None:
+        """
+        Returns the host with the given MAC address
+        """
+        return self._hosts.get(mac.upper())
+
+    def get_host_interface(self, mac: str) -> str | None:
+        """
+        Returns the interface of the host with the given MAC address
+        """
+        return self._interfaces.get(mac.upper())
+
+    def find_by_ip(self, ip: str) -> dict[str, Any] | None:
+        """
+        Returns the active host with the given IP address
+        """
+        mac = self._by_ip.get(ip)
+        return None if mac is None else self._hosts[mac]
+
+    def find_by_name(self, name: str) -> list[dict[str, Any]]:
+        """
+        Returns the hosts with the given name, case insensitive
+        """
+        return [self._hosts[mac] for mac in sorted(self._by_name.get(name.lower(), ()))]
+
+    def is_present(self, mac: str) -> bool:
+        """
+        Returns whether the host with the given MAC address is active
+        """
+        fingerprint = self._fingerprints.get(mac.upper())
+        return fingerprint is not None and fingerprint[0]
+
+    def get_present_hosts(self) -> list[dict[str, Any]]:
+        """
+        Returns the active hosts
+        """
+        return [
+            self._hosts[mac]
+            for mac, (active, _, _) in self._fingerprints.items()
+            if active
+        ]
@@ -0,0 +1,184 @@
+"""
+Rate limiting of the requests sent to a Freebox.
+"""
+
+import asyncio
+import heapq
+import time
+from collections.abc import AsyncIterator
+from collections.abc import Iterator
+from contextlib import asynccontextmanager
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fnmatch import fnmatchcase
+
+# Request priorities, lower values are sent first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+# Priority of requests per path pattern.
+# Patterns are matched against the request path without its query string,
+# the first matching pattern wins, other requests have a normal priority.
+DEFAULT_REQUEST_PRIORITIES: dict[str, int] = {
+    "player/*/control/*": PRIORITY_INTERACTIVE,
+    "rrd/": PRIORITY_BACKGROUND,
+    "lan/browser/*": PRIORITY_BACKGROUND,
+    "fs/tasks/*": PRIORITY_BACKGROUND,
+    "downloads/*": PRIORITY_BACKGROUND,
+}
+
+DEFAULT_MAX_IN_FLIGHT = 8
+
+_request_priority: ContextVar[int | None] = ContextVar("request_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """
+    Send the requests made in this context with the given priority,
+    whatever their path
+
+        with request_priority(PRIORITY_BACKGROUND):
+            await fbx.lan.get_hosts_list()
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class RequestThrottle:
+    """
+    Token bucket rate limit and maximum number of requests in flight
+
+    Requests waiting for their turn are sent by priority, then in arrival
+    order, so that interactive commands go ahead of background polls.
+    A throttle applies to a single freebox and must not be shared.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        burst: int = 1,
+        max_in_flight: int | None = DEFAULT_MAX_IN_FLIGHT,
+        priorities: dict[str, int] = DEFAULT_REQUEST_PRIORITIES,
+    ) -> None:
+        """
+        rate : `float`, optional
+            Maximum number of requests per second, default to no limit
+        burst : `int`, optional
+            Number of requests which can be sent at once over the rate,
+            default to 1
+        max_in_flight : `int`, optional
+            Maximum number of requests in flight, default to 8, None for no limit
+        priorities : `dict`, optional
+            Priority of requests per path pattern
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.priorities = dict(priorities)
+        self.in_flight = 0
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        # Heap of (priority, arrival, future) of the waiting requests
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._arrivals = 0
+        self._wakeup: asyncio.TimerHandle | None = None
+        self.waited_count = 0
+
+    def get_priority(self, end_url: str) -> int:
+        """
+        Returns the priority of a request to the given url
+        """
+        priority = _request_priority.get()
+        if priority is not None:
+            return priority
+
+        path = end_url.split("?", 1)[0]
+        for pattern, pattern_priority in self.priorities.items():
+            if fnmatchcase(path, pattern):
+                return pattern_priority
+        return PRIORITY_NORMAL
+
+    @asynccontextmanager
+    async def request(self, end_url: str) -> AsyncIterator[None]:
+        """
+        Wait for the turn of a request to the given url, which is counted in
+        flight until the context exits
+        """
+        await self._acquire(self.get_priority(end_url))
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    async def _acquire(self, priority: int) -> None:
+        if not self._waiters and self._take():
+            return
+
+        self.waited_count += 1
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, self._arrivals, waiter))
+        self._arrivals += 1
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Cancelled once its turn came, let the next request go
+                self.in_flight -= 1
+                self._dispatch()
+            raise
+
+    def _take(self) -> bool:
+        """
+        Count a request in flight if the limits allow it
+        """
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            return False
+
+        if self.rate is not None:
+            now = time.monotonic()
+            self._tokens = min(
+                float(self.burst),
+                self._tokens + (now - self._updated_at) * self.rate,
+            )
+            self._updated_at = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+
+        self.in_flight += 1
+        return True
+
+    def _dispatch(self) -> None:
+        """
+        Let waiting requests go while the limits allow it
+        """
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+
+        while self._waiters:
+            waiter = self._waiters[0][2]
+            if waiter.done():
+                # Cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if not self._take():
+                break
+            heapq.heappop(self._waiters)
+            waiter.set_result(None)
+
+        if (
+            self._waiters
+            and self.rate is not None
+            and (self.max_in_flight is None or self.in_flight < self.max_in_flight)
+        ):
+            # Waiting for a token, not for a request to end
+            delay = (1 - self._tokens) / self.rate
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
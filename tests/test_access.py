@@ -0,0 +1,279 @@
+"""Test the session refresh, the response cache, the GET coalescing and the
+raw responses of Access"""
+
+import asyncio
+from http import HTTPStatus
+from typing import Any
+from typing import cast
+
+import pytest
+from aiohttp import ClientSession
+
+from freebox_api.access import Access
+from freebox_api.cache import ResponseCache
+from freebox_api.exceptions import HttpRequestError
+
+BASE_URL = "http://freebox/api/v8/"
+CONCURRENT_REQUESTS = 5
+# Seconds before a test waiting forever fails
+TIMEOUT = 5
+
+
+class FakeResponse:
+    def __init__(
+        self,
+        data: dict[str, Any],
+        status: int = HTTPStatus.OK,
+        content_type: str = "application/json",
+    ) -> None:
+        self._data = data
+        self.status = status
+        self.ok = status < HTTPStatus.BAD_REQUEST
+        self.content_type = content_type
+        self.read = False
+
+    async def json(self) -> dict[str, Any]:
+        self.read = True
+        return self._data
+
+
+class FakeSession:
+    """
+    Freebox answering each authenticated request with the request path
+    """
+
+    def __init__(self) -> None:
+        self.token: str | None = None
+        self.login_count = 0
+        # (verb, path) of the authenticated requests
+        self.requests: list[tuple[str, str]] = []
+        # GET responses wait for this event
+        self.released = asyncio.Event()
+        self.released.set()
+        # Responses of the authenticated requests, by path, default to the path
+        self.responses: dict[str, FakeResponse] = {}
+
+    async def get(self, url: str, **kwargs: Any) -> FakeResponse:
+        if url == BASE_URL + "login":
+            return FakeResponse({"success": True, "result": {"challenge": "c"}})
+        response = self._answer("GET", url, kwargs)
+        await self.released.wait()
+        return response
+
+    async def wait_requests(self, count: int) -> None:
+        """
+        Wait until the given number of requests was received
+        """
+        while len(self.requests) < count:
+            await asyncio.sleep(0)
+
+    async def post(self, url: str, **kwargs: Any) -> FakeResponse:
+        if url == BASE_URL + "login/session/":
+            # Let concurrent callers pile up on the exchange
+            await asyncio.sleep(0.01)
+            self.login_count += 1
+            self.token = f"token-{self.login_count}"
+            return FakeResponse(
+                {"success": True, "result": {"session_token": self.token}}
+            )
+        return self._answer("POST", url, kwargs)
+
+    async def put(self, url: str, **kwargs: Any) -> FakeResponse:
+        return self._answer("PUT", url, kwargs)
+
+    def _answer(self, verb: str, url: str, kwargs: dict[str, Any]) -> FakeResponse:
+        path = url[len(BASE_URL) :]
+        if kwargs["headers"]["X-Fbx-App-Auth"] != self.token:
+            return FakeResponse(
+                {"success": False, "error_code": "invalid_session"},
+                HTTPStatus.FORBIDDEN,
+            )
+        self.requests.append((verb, path))
+        if path in self.responses:
+            return self.responses[path]
+        return FakeResponse(
+            {"success": True, "result": {"path": path, "count": len(self.requests)}}
+        )
+
+
+def create_access(session: FakeSession, cache: ResponseCache | None = None) -> Access:
+    return Access(
+        cast(ClientSession, session), BASE_URL, "app-token", "app-id", 10, cache=cache
+    )
+
+
+def test_concurrent_requests_share_login() -> None:
+    """
+    Requests sent without a session wait for a single login exchange
+    """
+
+    async def run() -> None:
+        session = FakeSession()
+        access = create_access(session)
+        urls = [f"resource/{i}" for i in range(CONCURRENT_REQUESTS)]
+        results = await asyncio.gather(*(access.get(url) for url in urls))
+        assert [r["path"] for r in results] == urls
+        assert session.login_count == 1
+        assert access.session_refresh_count == 1
+        assert access.session_refresh_saved_count == CONCURRENT_REQUESTS - 1
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_expired_session_refreshed_once() -> None:
+    """
+    Requests rejected with an expired session replay after a single login
+    """
+
+    async def run() -> None:
+        session = FakeSession()
+        access = create_access(session)
+        access.restore_session("expired", None)
+        urls = [f"resource/{i}" for i in range(CONCURRENT_REQUESTS)]
+        results = await asyncio.gather(*(access.put(url) for url in urls))
+        assert [r["path"] for r in results] == urls
+        assert session.login_count == 1
+        assert access.session_token == "token-1"
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_write_invalidates_cached_gets() -> None:
+    """
+    Cached GET results are served until a write on their resource
+    """
+
+    async def run() -> None:
+        session = FakeSession()
+        access = create_access(session, ResponseCache({"resource/*": 60}))
+        first = await access.get("resource/item")
+        assert await access.get("resource/item") == first
+        await access.put("other/item")
+        assert await access.get("resource/item") == first
+        await access.put("resource/other")
+        assert await access.get("resource/item") != first
+        assert session.requests == [
+            ("GET", "resource/item"),
+            ("PUT", "other/item"),
+            ("PUT", "resource/other"),
+            ("GET", "resource/item"),
+        ]
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_identical_gets_coalesced() -> None:
+    """
+    Identical GET requests in flight share a single request and get
+    independent copies of its result
+    """
+
+    async def run() -> None:
+        session = FakeSession()
+        access = create_access(session)
+        await access.get_permissions()
+        session.released.clear()
+        gets = [
+            asyncio.ensure_future(access.get("resource/"))
+            for _ in range(CONCURRENT_REQUESTS)
+        ]
+        await session.wait_requests(1)
+        session.released.set()
+        results = await asyncio.gather(*gets)
+
+        assert session.requests == [("GET", "resource/")]
+        assert access.get_coalesced_count == CONCURRENT_REQUESTS - 1
+        assert all(result == results[0] for result in results)
+        assert results[0] is not results[1]
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_get_after_write_not_coalesced() -> None:
+    """
+    A GET sent after a write on the same resource does not join a GET
+    sent before the write
+    """
+
+    async def run() -> None:
+        session = FakeSession()
+        access = create_access(session)
+        await access.get_permissions()
+        session.released.clear()
+        before = asyncio.ensure_future(access.get("resource/item"))
+        await session.wait_requests(1)
+        await access.put("resource/other")
+        after = asyncio.ensure_future(access.get("resource/item"))
+        await session.wait_requests(3)
+        session.released.set()
+
+        assert (await before)["count"] == 1
+        assert (await after)["count"] == len(session.requests)
+        assert session.requests == [
+            ("GET", "resource/item"),
+            ("PUT", "resource/other"),
+            ("GET", "resource/item"),
+        ]
+        assert access.get_coalesced_count == 0
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_raw_responses_not_read() -> None:
+    """
+    Successful or allowed responses are returned without reading their body
+    """
+
+    async def run() -> None:
+        session = FakeSession()
+        access = create_access(session)
+        ok = session.responses["file"] = FakeResponse({})
+        not_satisfiable = session.responses["range"] = FakeResponse(
+            {}, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        allowed = (HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,)
+
+        assert await access._perform_request(session.get, "file", raw_statuses=()) is ok
+        assert (
+            await access._perform_request(session.get, "range", raw_statuses=allowed)
+            is not_satisfiable
+        )
+        assert not ok.read
+        assert not not_satisfiable.read
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_raw_error_read_as_api_error() -> None:
+    """
+    Error responses of raw requests are read as API errors
+    """
+
+    async def run() -> None:
+        session = FakeSession()
+        access = create_access(session)
+        session.responses["file"] = FakeResponse(
+            {"success": False, "error_code": "not_found"}, HTTPStatus.NOT_FOUND
+        )
+
+        with pytest.raises(HttpRequestError, match="not_found"):
+            await access._perform_request(session.get, "file", raw_statuses=())
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_raw_request_refreshes_session() -> None:
+    """
+    Raw requests rejected with an expired session replay after a login
+    """
+
+    async def run() -> None:
+        session = FakeSession()
+        access = create_access(session)
+        access.restore_session("expired", None)
+        ok = session.responses["file"] = FakeResponse({})
+
+        assert await access._perform_request(session.get, "file", raw_statuses=()) is ok
+        assert session.login_count == 1
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
@@ -0,0 +1,94 @@
+"""Test the response cache"""
+
+import time
+
+import pytest
+
+from freebox_api.cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """
+    Monotonic clock of the cache, advanced by setting its first item
+    """
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_result_expires_after_ttl(clock: list[float]) -> None:
+    """
+    Results are served until their time to live elapses
+    """
+    response_cache = ResponseCache({"system/": 30})
+    response_cache.store("system/", {"uptime": 1}, response_cache.generation)
+
+    clock[0] = 29
+    assert response_cache.lookup("system/") == (True, {"uptime": 1})
+    clock[0] = 30
+    assert response_cache.lookup("system/") == (False, None)
+
+
+def test_uncacheable_url_not_stored(clock: list[float]) -> None:
+    """
+    Results of urls without a time to live are not stored
+    """
+    response_cache = ResponseCache({"system/": 30})
+    response_cache.store("lan/browser/pub/", [], response_cache.generation)
+
+    assert response_cache.lookup("lan/browser/pub/") == (False, None)
+
+
+def test_lookup_returns_copies(clock: list[float]) -> None:
+    """
+    Callers cannot modify the cached results
+    """
+    response_cache = ResponseCache({"system/": 30})
+    response_cache.store("system/", {"uptime": 1}, response_cache.generation)
+    _, result = response_cache.lookup("system/")
+    result["uptime"] = 2
+
+    assert response_cache.lookup("system/") == (True, {"uptime": 1})
+
+
+def test_invalidate_drops_resource(clock: list[float]) -> None:
+    """
+    A write drops the cached results of its resource only
+    """
+    response_cache = ResponseCache({"lan/*": 60, "system/": 30})
+    for url in ("lan/config/", "lan/browser/interfaces", "system/"):
+        response_cache.store(url, {}, response_cache.generation)
+
+    response_cache.invalidate("/lan/browser/pub/host?x=1")
+
+    assert response_cache.lookup("lan/config/") == (False, None)
+    assert response_cache.lookup("lan/browser/interfaces") == (False, None)
+    assert response_cache.lookup("system/") == (True, {})
+
+
+def test_result_fetched_before_write_not_stored(clock: list[float]) -> None:
+    """
+    A result fetched before a write is not stored after it
+    """
+    response_cache = ResponseCache({"system/": 30})
+    generation = response_cache.generation
+    response_cache.invalidate("system/reboot/")
+    response_cache.store("system/", {"uptime": 1}, generation)
+
+    assert response_cache.lookup("system/") == (False, None)
+
+
+def test_least_recently_used_evicted(clock: list[float]) -> None:
+    """
+    The least recently used result is evicted when the cache is full
+    """
+    response_cache = ResponseCache({"*": 60}, max_size=2)
+    response_cache.store("a/", 1, response_cache.generation)
+    response_cache.store("b/", 2, response_cache.generation)
+    response_cache.lookup("a/")
+    response_cache.store("c/", 3, response_cache.generation)
+
+    assert response_cache.lookup("a/") == (True, 1)
+    assert response_cache.lookup("b/") == (False, None)
+    assert response_cache.evictions == 1
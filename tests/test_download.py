@@ -0,0 +1,80 @@
+"""Test the parallel ranges of file downloads"""
+
+import asyncio
+
+import pytest
+
+from freebox_api.api.download import _run_all
+
+# Seconds before a test waiting forever fails
+TIMEOUT = 5
+RANGES = 3
+
+
+def test_first_failure_cancels_others() -> None:
+    """
+    The first failing range cancels the others, which are awaited
+    """
+    cancelled: list[str] = []
+
+    async def fail() -> None:
+        await asyncio.sleep(0)
+        raise ValueError("range failed")
+
+    async def hang(name: str) -> None:
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+
+    async def run() -> None:
+        with pytest.raises(ValueError, match="range failed"):
+            await _run_all([hang("a"), fail(), hang("b")])
+        # Cancelled ranges are done once _run_all returns
+        assert sorted(cancelled) == ["a", "b"]
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_all_ranges_run() -> None:
+    """
+    All ranges run to completion when none fails
+    """
+    done: list[int] = []
+
+    async def save(index: int) -> None:
+        await asyncio.sleep(0)
+        done.append(index)
+
+    async def run() -> None:
+        await _run_all(save(index) for index in range(RANGES))
+
+        assert sorted(done) == list(range(RANGES))
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_cancelled_caller_cancels_ranges() -> None:
+    """
+    Cancelling the download cancels its ranges
+    """
+    cancelled: list[None] = []
+
+    async def hang() -> None:
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(None)
+            raise
+
+    async def run() -> None:
+        task = asyncio.ensure_future(_run_all(hang() for _ in range(RANGES)))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert len(cancelled) == RANGES
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
@@ -0,0 +1,156 @@
+"""Test the events websocket"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+from typing import cast
+
+import pytest
+from aiohttp import WSMsgType
+
+from freebox_api.access import Access
+from freebox_api.api import events as events_module
+from freebox_api.api.events import Events
+
+# Seconds before a test waiting forever fails
+TIMEOUT = 5
+# Events received on the two successive websockets
+EVENTS = 2
+
+
+def notification(event: str, result: Any = None) -> str:
+    source, _, name = event.partition("_")
+    return json.dumps(
+        {
+            "success": True,
+            "action": "notification",
+            "source": source,
+            "event": name,
+            "result": result,
+        }
+    )
+
+
+class FakeMessage:
+    def __init__(self, data: str, msg_type: WSMsgType = WSMsgType.TEXT) -> None:
+        self.data = data
+        self.type = msg_type
+
+
+class FakeWebSocket:
+    """
+    Websocket receiving the given messages, then closed or left open
+    """
+
+    def __init__(self, messages: list[FakeMessage], closed: bool = True) -> None:
+        self.messages = messages
+        self.closed = closed
+        self.sent: list[Any] = []
+
+    async def send_json(self, data: Any) -> None:
+        self.sent.append(data)
+
+    async def close(self) -> None:
+        pass
+
+    async def __aiter__(self) -> AsyncIterator[FakeMessage]:
+        for message in self.messages:
+            yield message
+        if not self.closed:
+            await asyncio.Event().wait()
+
+
+class FakeAccess:
+    """
+    Access opening the given websockets in turn
+    """
+
+    def __init__(self, *websockets: FakeWebSocket) -> None:
+        self.websockets = list(websockets)
+
+    async def ws_connect(self, end_url: str, **kwargs: Any) -> FakeWebSocket:
+        return self.websockets.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def no_reconnect_delay(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(events_module, "_MIN_RECONNECT_DELAY", 0)
+
+
+def test_events_routed_to_iterators() -> None:
+    """
+    Iterators get the events they registered, invalid messages are skipped
+    """
+    ws = FakeWebSocket(
+        [
+            FakeMessage("not json"),
+            FakeMessage("[]"),
+            FakeMessage(json.dumps({"success": True, "action": "notification"})),
+            FakeMessage(json.dumps({"success": False, "msg": "error"})),
+            FakeMessage("", WSMsgType.BINARY),
+            FakeMessage(notification("vm_state_changed", 1)),
+            FakeMessage(notification("lan_host_l3addr_reachable", 2)),
+        ],
+        closed=False,
+    )
+
+    async def run() -> None:
+        events = Events(cast(Access, FakeAccess(ws)))
+        received = []
+        async for event in events.iter_lan_host_events():
+            received.append(event)
+            break
+
+        assert received == [
+            {"source": "lan", "event": "host_l3addr_reachable", "result": 2}
+        ]
+        assert ws.sent == [
+            {"action": "register", "events": sorted(events_module.LAN_HOST_EVENTS)}
+        ]
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_closed_websocket_opened_again() -> None:
+    """
+    A closed websocket is opened again, registering the events again
+    """
+    first = FakeWebSocket([FakeMessage(notification("vm_state_changed", 1))])
+    second = FakeWebSocket(
+        [FakeMessage(notification("vm_disk_task_done", 2))], closed=False
+    )
+
+    async def run() -> None:
+        events = Events(cast(Access, FakeAccess(first, second)))
+        received = []
+        async for event in events.iter_vm_events():
+            received.append(event["result"])
+            if len(received) == EVENTS:
+                break
+
+        assert received == [1, 2]
+        assert events.reconnect_count == 1
+        assert first.sent == second.sent
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_close_stops_iterators() -> None:
+    """
+    Closing the events stops the running iterators
+    """
+
+    async def run() -> None:
+        events = Events(cast(Access, FakeAccess(FakeWebSocket([], closed=False))))
+
+        async def consume() -> list[Any]:
+            return [event async for event in events.iter_vm_events()]
+
+        consumer = asyncio.ensure_future(consume())
+        await asyncio.sleep(0)
+        await events.close()
+
+        assert await consumer == []
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
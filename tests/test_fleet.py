@@ -0,0 +1,83 @@
+"""Test the management of a fleet of Freeboxes"""
+
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from freebox_api.aiofreepybox import Freepybox
+from freebox_api.exceptions import NotOpenError
+from freebox_api.fleet import FreeboxFleet
+
+# Seconds before a test waiting forever fails
+TIMEOUT = 5
+
+
+@pytest.fixture
+def opened(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """
+    Hosts of the boxes opened, without connecting to them
+    """
+    hosts: list[str] = []
+
+    async def fake_open(self: Freepybox, host: str, port: str, **kwargs: Any) -> None:
+        hosts.append(host)
+
+    async def fake_close(self: Freepybox) -> None:
+        pass
+
+    monkeypatch.setattr(Freepybox, "open", fake_open)
+    monkeypatch.setattr(Freepybox, "close", fake_close)
+    return hosts
+
+
+@pytest.mark.parametrize("option", ["connector", "session"])
+def test_pool_options_rejected(option: str, tmp_path: Path) -> None:
+    """
+    Options replacing the shared connection pool are rejected
+    """
+    options: dict[str, Any] = {option: None}
+    fleet = FreeboxFleet()
+    with pytest.raises(ValueError, match=option):
+        fleet.add_box("box", "host", "443", tmp_path / "token", **options)
+    assert fleet.names == []
+
+
+def test_default_session_rejected() -> None:
+    """
+    Boxes cannot default to a session of their own
+    """
+    options: dict[str, Any] = {"session": None}
+    with pytest.raises(ValueError, match="session"):
+        FreeboxFleet(**options)
+
+
+def test_invalid_box_isolated(opened: list[str], tmp_path: Path) -> None:
+    """
+    A box failing to open does not prevent the others from being used
+    """
+
+    async def run() -> None:
+        fleet = FreeboxFleet()
+        fleet.add_box("good", "good-host", "443", tmp_path / "good")
+        fleet.add_box("bad", "bad-host", "443", tmp_path / "bad", invalid=True)
+        try:
+            errors = await fleet.open()
+
+            assert list(errors) == ["bad"]
+            assert isinstance(errors["bad"], TypeError)
+            assert fleet.open_errors == errors
+            assert fleet.opened == ["good"]
+            assert opened == ["good-host"]
+
+            async def get_token_file(fbx: Freepybox) -> Any:
+                return fbx.token_file
+
+            results = await fleet.call_all(get_token_file)
+            assert results["good"] == tmp_path / "good"
+            assert isinstance(results["bad"], NotOpenError)
+        finally:
+            await fleet.close()
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
@@ -0,0 +1,117 @@
+"""Test the tracking of file system tasks"""
+
+import asyncio
+from typing import Any
+from typing import cast
+
+import pytest
+
+from freebox_api.api.fs import Fs
+from freebox_api.api.fs import FsTaskTracker
+from freebox_api.exceptions import FsTaskError
+
+# Seconds before a test waiting forever fails
+TIMEOUT = 5
+INTERVAL = 0.01
+
+
+class FakeFs:
+    """
+    Fs listing the given successive task lists, then the last one forever
+    """
+
+    def __init__(self, *tasks_lists: list[dict[str, Any]]) -> None:
+        self.tasks_lists = list(tasks_lists)
+        self.calls = 0
+
+    async def get_tasks_list(self) -> list[dict[str, Any]]:
+        self.calls += 1
+        if len(self.tasks_lists) > 1:
+            return self.tasks_lists.pop(0)
+        return self.tasks_lists[0]
+
+
+def create_tracker(fs: FakeFs) -> FsTaskTracker:
+    return FsTaskTracker(cast(Fs, fs), min_interval=INTERVAL, max_interval=INTERVAL)
+
+
+def test_update_detects_progress() -> None:
+    """
+    Tasks progress when their state or progress changes
+    """
+
+    async def run() -> None:
+        tracker = create_tracker(FakeFs([]))
+        tracker._futures[1] = asyncio.get_running_loop().create_future()
+
+        assert tracker._update({"id": 1, "state": "running", "progress": 10})
+        assert not tracker._update({"id": 1, "state": "running", "progress": 10})
+        assert tracker._update({"id": 1, "state": "running", "progress": 20})
+        assert tracker._update({"id": 1, "state": "paused", "progress": 20})
+        assert not tracker._futures[1].done()
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_update_resolves_finished_tasks() -> None:
+    """
+    Done tasks resolve their future, failed ones raise FsTaskError
+    """
+
+    async def run() -> None:
+        tracker = create_tracker(FakeFs([]))
+        loop = asyncio.get_running_loop()
+        done = tracker._futures[1] = loop.create_future()
+        failed = tracker._futures[2] = loop.create_future()
+
+        tracker._update({"id": 1, "state": "done"})
+        tracker._update({"id": 2, "state": "failed", "error": "disk_full"})
+
+        assert done.result() == {"id": 1, "state": "done"}
+        with pytest.raises(FsTaskError, match="disk_full"):
+            failed.result()
+        assert not tracker._futures
+        assert not tracker._progress
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_wait_polls_until_done() -> None:
+    """
+    Tasks are polled until done, with a single listing for all of them
+    """
+    running: list[dict[str, Any]] = [
+        {"id": 1, "state": "running"},
+        {"id": 2, "state": "running"},
+    ]
+    done: list[dict[str, Any]] = [
+        {"id": 1, "state": "done"},
+        {"id": 2, "state": "done"},
+    ]
+
+    async def run() -> None:
+        fs = FakeFs(running, done)
+        tracker = create_tracker(fs)
+
+        results = await asyncio.gather(
+            tracker.wait(running[0]), tracker.wait(running[1])
+        )
+
+        assert list(results) == done
+        assert fs.calls == len([running, done])
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_missing_task_fails() -> None:
+    """
+    Tasks no longer listed fail
+    """
+
+    async def run() -> None:
+        tracker = create_tracker(FakeFs([]))
+
+        with pytest.raises(FsTaskError, match="not found"):
+            await tracker.wait(1)
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
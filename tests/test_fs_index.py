@@ -0,0 +1,104 @@
+"""Test the local index of the file system"""
+
+import asyncio
+from pathlib import Path
+from typing import Any
+from typing import cast
+
+from freebox_api.api.fs import Fs
+from freebox_api.exceptions import HttpRequestError
+from freebox_api.fs_index import FsIndex
+
+# Seconds before a test waiting forever fails
+TIMEOUT = 5
+MOVIE_SIZE = 700
+SONG_SIZE = 5
+
+
+def entry(
+    name: str, kind: str = "file", size: int = 0, modification: int = 1
+) -> dict[str, Any]:
+    return {"name": name, "type": kind, "size": size, "modification": modification}
+
+
+class FakeFs:
+    """
+    Fs listing directories from a dict of (modification, entries) by path
+    """
+
+    def __init__(self, tree: dict[str, tuple[int, list[dict[str, Any]]]]) -> None:
+        self.tree = tree
+        self.failing: set[str] = set()
+        self.listed: list[str] = []
+
+    async def get_info(self, path: str) -> dict[str, Any]:
+        if path in self.failing:
+            raise HttpRequestError("Request failed")
+        return {"modification": self.tree[path][0]}
+
+    async def list_files(self, path: str) -> list[dict[str, Any]]:
+        if path in self.failing:
+            raise HttpRequestError("Request failed")
+        self.listed.append(path)
+        return [entry("."), entry(".."), *self.tree[path][1]]
+
+
+def create_tree() -> dict[str, tuple[int, list[dict[str, Any]]]]:
+    return {
+        "/": (1, [entry("Movies", "dir"), entry("Music", "dir")]),
+        "/Movies": (1, [entry("movie.mkv", size=MOVIE_SIZE)]),
+        "/Music": (1, [entry("song.mp3", size=SONG_SIZE)]),
+    }
+
+
+def refresh(
+    tmp_path: Path, fs: FakeFs, **kwargs: Any
+) -> tuple[dict[str, int], int, list[dict[str, Any]]]:
+    """
+    Refresh the index, returning its stats, total size and mp3 files
+    """
+
+    async def run() -> tuple[dict[str, int], int, list[dict[str, Any]]]:
+        index = FsIndex(cast(Fs, fs), tmp_path / "index.db")
+        try:
+            stats = await index.refresh(**kwargs)
+            return stats, await index.get_size(), await index.search("*.mp3")
+        finally:
+            await index.close()
+
+    return asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_unchanged_directories_not_listed(tmp_path: Path) -> None:
+    """
+    Directories are listed again only when their modification time changed
+    """
+    fs = FakeFs(create_tree())
+    stats, size, _ = refresh(tmp_path, fs)
+    assert stats == {"listed": 3, "unchanged": 0, "failed": 0}
+    assert size == MOVIE_SIZE + SONG_SIZE
+
+    fs.listed.clear()
+    fs.tree["/Music"] = (2, [])
+    fs.tree["/"] = (2, [entry("Movies", "dir"), entry("Music", "dir", modification=2)])
+    stats, size, songs = refresh(tmp_path, fs)
+
+    assert fs.listed == ["/", "/Music"]
+    assert stats == {"listed": 2, "unchanged": 1, "failed": 0}
+    assert size == MOVIE_SIZE
+    assert songs == []
+
+
+def test_failed_directory_kept(tmp_path: Path) -> None:
+    """
+    Directories failing to be listed keep their index and are counted
+    """
+    fs = FakeFs(create_tree())
+    refresh(tmp_path, fs)
+
+    fs.failing.add("/Music")
+    stats, size, songs = refresh(tmp_path, fs, full=True)
+
+    assert stats == {"listed": 2, "unchanged": 0, "failed": 1}
+    assert size == MOVIE_SIZE + SONG_SIZE
+    assert [song["path"] for song in songs] == ["/Music/song.mp3"]
@@ -0,0 +1,75 @@
+"""Test the multi-interface LAN host fetch"""
+
+import asyncio
+from typing import Any
+from typing import cast
+
+from freebox_api.access import Access
+from freebox_api.api.lan import Lan
+from freebox_api.api.lan import get_host_mac
+from freebox_api.api.lan import merge_hosts
+
+LAPTOP = {"id": "ether-aa:aa", "l2ident": {"id": "aa:aa", "type": "mac_address"}}
+PHONE = {"id": "ether-bb:bb", "active": True}
+
+
+class FakeAccess:
+    """
+    Access answering GET requests from a dict of results by url
+    """
+
+    def __init__(self, results: dict[str, Any]) -> None:
+        self.results = results
+        self.urls: list[str] = []
+        self.use_models = False
+
+    async def get(self, end_url: str) -> Any:
+        self.urls.append(end_url)
+        return self.results.get(end_url)
+
+
+def test_host_mac() -> None:
+    """
+    Hosts are identified by their upper case MAC address, or their id
+    """
+    assert get_host_mac(LAPTOP) == "AA:AA"
+    assert get_host_mac(PHONE) == "ETHER-BB:BB"
+
+
+def test_merge_prefers_active_interface() -> None:
+    """
+    A host listed on several interfaces is kept on the first one where it
+    is active
+    """
+    inactive = {**LAPTOP, "active": False}
+    active = {**LAPTOP, "active": True}
+
+    merged = merge_hosts({"pub": [inactive], "wifiguest": [active], "other": [active]})
+
+    assert merged == {"AA:AA": ("wifiguest", active)}
+
+
+def test_hosts_by_interface() -> None:
+    """
+    Interfaces without hosts are not requested, others are listed
+    """
+    access = FakeAccess(
+        {
+            "lan/browser/interfaces": [
+                {"name": "pub", "host_count": 2},
+                {"name": "wifiguest", "host_count": 0},
+                {"name": "other"},
+            ],
+            "lan/browser/pub": [LAPTOP, PHONE],
+        }
+    )
+    lan = Lan(cast(Access, access))
+
+    hosts = asyncio.run(lan.get_hosts_by_interface())
+
+    assert hosts == {"pub": [LAPTOP, PHONE], "wifiguest": [], "other": []}
+    assert sorted(access.urls) == [
+        "lan/browser/interfaces",
+        "lan/browser/other",
+        "lan/browser/pub",
+    ]
@@ -0,0 +1,132 @@
+"""Test the compact response models"""
+
+from typing import Any
+
+import pytest
+
+from freebox_api.models import L2Ident
+from freebox_api.models import LanHost
+from freebox_api.models import decode
+from freebox_api.poller import Poller
+
+HOST: dict[str, Any] = {
+    "id": "ether-aa:bb:cc:dd:ee:ff",
+    "primary_name": "Laptop",
+    "default_name": "laptop",
+    "host_type": "laptop",
+    "l2ident": {"id": "aa:bb:cc:dd:ee:ff", "type": "mac_address"},
+    "vendor_name": "Vendor",
+    "model": "Model",
+    "active": True,
+    "names": [{"name": "laptop", "source": "dhcp"}],
+    "l3connectivities": [{"addr": "192.168.1.2", "af": "ipv4", "active": True}],
+    "network_control": {"profile_id": 1, "name": "Kids"},
+    "access_point": {"mac": "00:11:22:33:44:55", "type": "gateway"},
+}
+
+
+def test_round_trip() -> None:
+    """
+    Models give back the response objects they were created from
+    """
+    host = LanHost.from_dict({**HOST, "undocumented": [1, 2]})
+
+    assert host.to_dict() == {**HOST, "undocumented": [1, 2]}
+
+
+def test_documented_fields() -> None:
+    """
+    Documented fields are read as attributes or items
+    """
+    host = LanHost.from_dict(HOST)
+
+    assert host.default_name == host["default_name"] == "laptop"
+    assert host.model == "Model"
+    assert host.network_control == HOST["network_control"]
+    assert host.access_point == HOST["access_point"]
+    assert host.reachable is None
+    assert host["reachable"] is None
+
+
+def test_undocumented_fields() -> None:
+    """
+    Undocumented fields are read as items only
+    """
+    host = LanHost.from_dict({**HOST, "undocumented": 1})
+
+    assert host["undocumented"] == 1
+    assert host.get("undocumented") == 1
+    assert host.get("missing", "default") == "default"
+    assert host.get("reachable", False) is False
+    with pytest.raises(KeyError):
+        host["missing"]
+
+
+def test_nested_decoded_on_access() -> None:
+    """
+    Nested objects are kept packed until first read
+    """
+    host = LanHost.from_dict(HOST)
+
+    # Packed values are stored in the slots of the nested fields
+    assert getattr(host, LanHost.l2ident.slot) == ("aa:bb:cc:dd:ee:ff", "mac_address")
+    assert getattr(host, LanHost.names.slot) == (("laptop", "dhcp"),)
+
+    l2ident = host.l2ident
+    assert isinstance(l2ident, L2Ident)
+    assert l2ident.type == "mac_address"
+    assert host.l2ident is l2ident
+    assert host.names is not None
+    assert host.names[0].source == "dhcp"
+    assert host.l3connectivities is not None
+    assert host.l3connectivities[0]["addr"] == "192.168.1.2"
+    assert host.to_dict() == HOST
+
+
+def test_nested_with_undocumented_fields() -> None:
+    """
+    Nested objects with undocumented fields keep them
+    """
+    l2ident = {**HOST["l2ident"], "undocumented": 1}
+    host = LanHost.from_dict({**HOST, "l2ident": l2ident})
+
+    assert host.l2ident is not None
+    assert host.l2ident["undocumented"] == 1
+    assert host.to_dict()["l2ident"] == l2ident
+
+
+def test_equality() -> None:
+    """
+    Models compare by value, whether nested objects were decoded or not
+    """
+    host = LanHost.from_dict(HOST)
+    decoded = LanHost.from_dict(HOST)
+    assert decoded.l2ident is not None
+    assert decoded.names is not None
+
+    assert host == decoded
+    assert host != LanHost.from_dict({**HOST, "active": False})
+    assert host != LanHost.from_dict({**HOST, "undocumented": 1})
+    assert host != HOST
+
+
+def test_decode() -> None:
+    """
+    Result lists are decoded only when models are asked for
+    """
+    assert decode([HOST], LanHost, False) == [HOST]
+    assert decode(None, LanHost, True) is None
+    assert decode([HOST], LanHost, True) == [LanHost.from_dict(HOST)]
+
+
+async def no_result() -> None:
+    return None
+
+
+def test_poller_state_of_models() -> None:
+    """
+    Models are keyed by their fields in poller states
+    """
+    host = LanHost.from_dict(HOST)
+
+    assert Poller(no_result, key="id")._to_state([host]) == {HOST["id"]: host}
@@ -0,0 +1,119 @@
+"""Test the change detection of Poller"""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from freebox_api.poller import Poller
+from freebox_api.poller import diff_states
+
+# Seconds before a test waiting forever fails
+TIMEOUT = 5
+INTERVAL = 0.01
+
+
+async def no_result() -> None:
+    return None
+
+
+def test_diff_states() -> None:
+    """
+    Keys are reported as added, removed or changed
+    """
+    diff = diff_states({"a": 1, "b": 2, "c": 3}, {"b": 2, "c": 4, "d": 5})
+
+    assert diff == {"added": {"d": 5}, "removed": {"a": 1}, "changed": {"c": (3, 4)}}
+
+
+@pytest.mark.parametrize(
+    ("key", "result", "state"),
+    [
+        (None, None, {}),
+        (None, {"a": 1}, {"a": 1}),
+        (None, 42, {"result": 42}),
+        (None, ["x", "y"], {0: "x", 1: "y"}),
+        ("mac", [{"mac": "A"}, {"mac": "B"}], {"A": {"mac": "A"}, "B": {"mac": "B"}}),
+        (lambda item: item["id"] * 2, [{"id": 1}], {2: {"id": 1}}),
+    ],
+)
+def test_result_to_state(key: Any, result: Any, state: dict[Any, Any]) -> None:
+    """
+    Results are compared as mappings
+    """
+    assert Poller(no_result, key=key)._to_state(result) == state
+
+
+def test_subscribers_get_changes() -> None:
+    """
+    Subscribers get the current result, then its changes only
+    """
+    results = [[{"id": 1, "v": 1}], [{"id": 1, "v": 1}], [{"id": 1, "v": 2}]]
+
+    async def getter() -> Any:
+        return results.pop(0) if len(results) > 1 else results[0]
+
+    async def run() -> None:
+        poller = Poller(getter, key="id", min_interval=INTERVAL, jitter=0)
+        diffs = []
+        async for diff in poller.subscribe():
+            diffs.append(diff)
+            if diff["changed"]:
+                break
+
+        assert diffs == [
+            {"added": {1: {"id": 1, "v": 1}}, "removed": {}, "changed": {}},
+            {
+                "added": {},
+                "removed": {},
+                "changed": {1: ({"id": 1, "v": 1}, {"id": 1, "v": 2})},
+            },
+        ]
+        # The unchanged result was polled but not notified
+        assert not results[1:]
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_polling_goes_on_after_error() -> None:
+    """
+    An unexpected error does not stop the polling
+    """
+    calls: list[None] = []
+
+    async def getter() -> Any:
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError("unexpected")
+        return {"a": 1}
+
+    async def run() -> None:
+        poller = Poller(getter, min_interval=INTERVAL, max_interval=INTERVAL)
+        async for diff in poller.subscribe():
+            assert diff["added"] == {"a": 1}
+            break
+        assert poller.last_error is None
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_error_recorded() -> None:
+    """
+    The error of the last poll is kept in last_error
+    """
+
+    async def getter() -> Any:
+        raise RuntimeError("unexpected")
+
+    async def run() -> None:
+        poller = Poller(getter, min_interval=INTERVAL, max_interval=INTERVAL)
+        subscriber = poller.subscribe()
+        waiting = asyncio.ensure_future(subscriber.__anext__())
+        while poller.last_error is None:
+            await asyncio.sleep(INTERVAL)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+        assert isinstance(poller.last_error, RuntimeError)
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
@@ -0,0 +1,110 @@
+"""Test the presence tracking of the LAN hosts"""
+
+from typing import Any
+from typing import cast
+
+from freebox_api.api.lan import Lan
+from freebox_api.presence import PRESENCE_IP_CHANGE
+from freebox_api.presence import PRESENCE_JOIN
+from freebox_api.presence import PRESENCE_LEAVE
+from freebox_api.presence import LanPresence
+
+MAC = "AA:BB:CC:DD:EE:FF"
+
+
+def host(
+    active: bool = True, ips: tuple[str, ...] = (), name: str = ""
+) -> dict[str, Any]:
+    return {
+        "id": f"ether-{MAC.lower()}",
+        "l2ident": {"id": MAC.lower(), "type": "mac_address"},
+        "active": active,
+        "primary_name": name,
+        "l3connectivities": [{"addr": ip, "active": True} for ip in ips],
+    }
+
+
+def create_presence() -> LanPresence:
+    return LanPresence(cast(Lan, None))
+
+
+def test_join_and_leave() -> None:
+    """
+    Hosts becoming active join, hosts becoming inactive or gone leave
+    """
+    presence = create_presence()
+
+    events = presence.update({"pub": [host(ips=("192.168.1.2",))]})
+    assert [(e["type"], e["mac"], e["new_ips"]) for e in events] == [
+        (PRESENCE_JOIN, MAC, frozenset({"192.168.1.2"}))
+    ]
+    assert presence.is_present(MAC.lower())
+
+    events = presence.update({"pub": [host(active=False, ips=("192.168.1.2",))]})
+    assert [(e["type"], e["old_ips"], e["new_ips"]) for e in events] == [
+        (PRESENCE_LEAVE, frozenset({"192.168.1.2"}), frozenset())
+    ]
+    assert not presence.is_present(MAC)
+
+    presence.update({"pub": [host()]})
+    events = presence.update({"pub": []})
+    assert [e["type"] for e in events] == [PRESENCE_LEAVE]
+    assert presence.get_host(MAC) is None
+
+
+def test_ip_change() -> None:
+    """
+    Active hosts changing addresses are reported and reindexed
+    """
+    presence = create_presence()
+    presence.update({"pub": [host(ips=("192.168.1.2",))]})
+
+    events = presence.update({"pub": [host(ips=("192.168.1.3",))]})
+
+    assert [(e["type"], e["old_ips"], e["new_ips"]) for e in events] == [
+        (PRESENCE_IP_CHANGE, frozenset({"192.168.1.2"}), frozenset({"192.168.1.3"}))
+    ]
+    assert presence.find_by_ip("192.168.1.2") is None
+    assert presence.find_by_ip("192.168.1.3") == host(ips=("192.168.1.3",))
+
+
+def test_unchanged_hosts_not_reported() -> None:
+    """
+    Updates without presence, address or name changes report nothing
+    """
+    presence = create_presence()
+    presence.update({"pub": [host(ips=("192.168.1.2",), name="Laptop")]})
+
+    assert presence.update({"pub": [host(ips=("192.168.1.2",), name="Laptop")]}) == []
+    assert presence.find_by_name("laptop") == [
+        host(ips=("192.168.1.2",), name="Laptop")
+    ]
+
+
+def test_renamed_host_reindexed() -> None:
+    """
+    Name changes are indexed without being reported
+    """
+    presence = create_presence()
+    presence.update({"pub": [host(name="Laptop")]})
+
+    assert presence.update({"pub": [host(name="Desktop")]}) == []
+    assert presence.find_by_name("laptop") == []
+    assert presence.find_by_name("DESKTOP") == [host(name="Desktop")]
+
+
+def test_host_on_several_interfaces() -> None:
+    """
+    A host listed on several interfaces is tracked on its active one
+    """
+    presence = create_presence()
+
+    events = presence.update(
+        {"pub": [host(active=False)], "wifiguest": [host(ips=("192.168.27.2",))]}
+    )
+
+    assert [(e["type"], e["interface"]) for e in events] == [
+        (PRESENCE_JOIN, "wifiguest")
+    ]
+    assert presence.get_host_interface(MAC) == "wifiguest"
+    assert [h["active"] for h in presence.get_present_hosts()] == [True]
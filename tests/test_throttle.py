@@ -0,0 +1,138 @@
+"""Test the request throttle"""
+
+import asyncio
+
+from freebox_api.throttle import PRIORITY_BACKGROUND
+from freebox_api.throttle import RequestThrottle
+from freebox_api.throttle import request_priority
+
+RATE = 100
+BURST = 2
+# Seconds before a test waiting forever fails
+TIMEOUT = 5
+
+
+async def send(
+    throttle: RequestThrottle, end_url: str, sent: list[str], done: asyncio.Event
+) -> None:
+    async with throttle.request(end_url):
+        sent.append(end_url)
+        await done.wait()
+
+
+def test_waiting_requests_sent_by_priority() -> None:
+    """
+    Waiting requests are sent by priority, then in arrival order
+    """
+
+    async def run() -> None:
+        throttle = RequestThrottle(max_in_flight=1)
+        sent: list[str] = []
+        done = asyncio.Event()
+        tasks = [
+            asyncio.ensure_future(send(throttle, url, sent, done))
+            for url in (
+                "system/",
+                "rrd/",
+                "lan/browser/pub/",
+                "player/1/control/mediactrl",
+                "connection/",
+            )
+        ]
+        await asyncio.sleep(0)
+        assert sent == ["system/"]
+        done.set()
+        await asyncio.gather(*tasks)
+
+        assert sent == [
+            "system/",
+            "player/1/control/mediactrl",
+            "connection/",
+            "rrd/",
+            "lan/browser/pub/",
+        ]
+        assert throttle.in_flight == 0
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_request_priority_overrides_path() -> None:
+    """
+    Requests sent within request_priority get its priority
+    """
+    throttle = RequestThrottle()
+    with request_priority(PRIORITY_BACKGROUND):
+        assert throttle.get_priority("player/1/control/mediactrl") == (
+            PRIORITY_BACKGROUND
+        )
+    assert throttle.get_priority("player/1/control/mediactrl") < PRIORITY_BACKGROUND
+
+
+def test_cancelled_waiter_skipped() -> None:
+    """
+    A request cancelled while waiting does not take the turn of the next one
+    """
+
+    async def run() -> None:
+        throttle = RequestThrottle(max_in_flight=1)
+        sent: list[str] = []
+        done = asyncio.Event()
+        first = asyncio.ensure_future(send(throttle, "a/", sent, done))
+        cancelled = asyncio.ensure_future(send(throttle, "b/", sent, done))
+        last = asyncio.ensure_future(send(throttle, "c/", sent, done))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        done.set()
+        await asyncio.gather(first, cancelled, last, return_exceptions=True)
+
+        assert sent == ["a/", "c/"]
+        assert throttle.in_flight == 0
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_cancelled_after_turn_releases_slot() -> None:
+    """
+    A request cancelled once its turn came lets the next one go
+    """
+
+    async def run() -> None:
+        throttle = RequestThrottle(max_in_flight=1)
+        sent: list[str] = []
+        done = asyncio.Event()
+        done.set()
+        first = throttle.request("a/")
+        await first.__aenter__()
+        cancelled = asyncio.ensure_future(send(throttle, "b/", sent, done))
+        last = asyncio.ensure_future(send(throttle, "c/", sent, done))
+        await asyncio.sleep(0)
+        # Give the turn to the second request, then cancel it before it runs
+        await first.__aexit__(None, None, None)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, last, return_exceptions=True)
+
+        assert sent == ["c/"]
+        assert throttle.in_flight == 0
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))
+
+
+def test_rate_limit_delays_requests() -> None:
+    """
+    Requests over the burst wait for the rate limit
+    """
+
+    async def run() -> None:
+        throttle = RequestThrottle(rate=RATE, burst=BURST, max_in_flight=None)
+        sent: list[str] = []
+        done = asyncio.Event()
+        done.set()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(send(throttle, f"{i}/", sent, done) for i in range(4)))
+
+        assert sent == ["0/", "1/", "2/", "3/"]
+        assert throttle.waited_count == len(sent) - BURST
+        assert loop.time() - start >= 1 / RATE
+
+    asyncio.run(asyncio.wait_for(run(), TIMEOUT))